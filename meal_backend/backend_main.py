@@ -1,20 +1,29 @@
 # ── backend_main.py ───────────────────────────────────────────
-from fastapi import FastAPI, HTTPException, Response, Request
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, Header, HTTPException, Response, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field, conint
-from typing import List, Dict, Optional, Union
-import sqlite3, os, math, json, re, logging
-from openai import OpenAI
+from typing import AsyncIterator, List, Dict, Optional, Tuple, Union
+import os, math, json, re, hmac, logging, asyncio, functools, threading, time, contextvars
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from openai import AsyncOpenAI
 
 # RAG 인덱스 가져오기
-from rag_index import build_or_load
+from rag_index import build_or_load, PERSIST_DIR
+from embeddings import OpenAIEmbedder, embedder_for_meta
+from vector_engine import VectorEngine, load_current
+from embed_cache import EmbeddingCache, embed_with_cache, normalize_query
+from nutrition_cache import NutritionCache, AsyncSingleFlight
+from food_db import fts5_trigram_supported, has_fts_index, fts_phrase, FTS_TABLE, FTS_MIN_LEN, ConnectionPool, POOL_SIZE, read_db_meta
+from food_table import FoodTable
+from meal_planner import plan_meals
+from response_cache import ResponseCache, canonical_key, etag_matches, request_ingredients
+from log_setup import configure_logging, start_request, annotate, log_request_summary
+from metrics import HTTP_SECONDS, RESOLVE_SOURCE, record_openai, register_cache_stats, render as render_metrics, stage
 
-# 로깅 설정
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# 로깅 설정 - 큐 핸들러(백그라운드 출력), 요청당 요약 1줄, 상세 로그는 DEBUG + LOG_SAMPLE_RATE 샘플링
+configure_logging()
 
 # ── FastAPI 인스턴스 ──────────────────────────────────────────
 app = FastAPI(title="Meal Planner API")
@@ -28,10 +37,74 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ── RAG 검색 설정 ─────────────────────────────────────────────
+RAG_TOP_K = 5                        # 재료당 기본 검색 개수
+vector_retriever = None              # 기동 시 생성되는 기본 retriever
+_retrievers: Dict[int, object] = {}  # top_k 별 retriever 캐시
+vector_engine = None                 # 배치 검색용 NumPy 엔진 (없으면 retriever 사용)
+embed_model = None                   # 질의 임베딩 백엔드 (엔진 스냅샷 meta 의 embed_backend 를 따름)
+VECTOR_DTYPE = os.getenv("VECTOR_DTYPE", "float32")  # 엔진 스냅샷 dtype (float32 | float16)
+embed_cache = EmbeddingCache()       # 질의 임베딩 캐시 (메모리 LRU + embed_cache.db)
+vector_index = None                  # llama-index 인덱스 (엔진 스냅샷이 없거나 retriever 필요 시에만 로드)
+
+# 기동 모드
+# • FAST_BOOT=1 (기본): 네트워크 호출 없는 구조 점검만 수행, 심층 진단은 /admin/rag_diagnostic
+# • RAG_LAZY_LOAD=1:    기동 시 로드하지 않고 첫 검색 요청 때 로드 (스냅샷 로드만 - 인덱스를 빌드하지 않음)
+# • ADMIN_TOKEN:        /admin/* 요청의 X-Admin-Token 헤더 값 (설정하지 않으면 /admin/* 비활성화)
+FAST_BOOT     = os.getenv("FAST_BOOT", "1") == "1"
+RAG_LAZY_LOAD = os.getenv("RAG_LAZY_LOAD", "0") == "1"
+ADMIN_TOKEN   = os.getenv("ADMIN_TOKEN", "")
+USE_RAG       = False
+_rag_loaded   = False
+_rag_lock     = threading.Lock()
+
+# ── DB 경로 ──────────────────────────────────────────────────
+DB_PATH = "foods.db"
+
+# 읽기 전용 연결 풀 - 요청마다 새로 연결하지 않고 재사용
+db_pool = ConnectionPool(DB_PATH)
+
+# 식품명 FTS5 trigram 인덱스 - 서빙은 존재 여부만 확인 (생성은 ingest_data.py / build_index.py)
+# 없거나 trigram 미지원 환경이면 LIKE 검색
+try:
+    with db_pool.connection() as conn:
+        USE_FTS = fts5_trigram_supported() and has_fts_index(conn)
+except Exception as e:
+    logging.warning(f"{FTS_TABLE} 확인 실패: {e}")
+    USE_FTS = False
+if not USE_FTS:
+    logging.info(f"{FTS_TABLE} 인덱스가 없어 LIKE 검색을 사용합니다 (python build_index.py 로 생성)")
+
+# foods.db meta 테이블 (db_version / id_scheme) - 스냅샷 버전 확인, 응답 캐시 키에 사용
+try:
+    with db_pool.connection() as conn:
+        DB_META = read_db_meta(conn)
+except Exception as e:
+    logging.warning(f"foods.db meta 조회 실패: {e}")
+    DB_META = {}
+
+# 키워드 검색 1회당 최대 결과 수 (RAG top_k 와 동일 기본값)
+DB_SEARCH_LIMIT = int(os.getenv("DB_SEARCH_LIMIT", str(RAG_TOP_K)))
+
+# 선택: foods 테이블을 기동 시 NumPy 컬럼 배열로 적재 (FOOD_TABLE_IN_MEMORY=1)
+# → RAG 결과 rowid 조회, 키워드 검색 결과의 식품명·영양 값을 SQLite 대신 메모리에서 읽음
+#   (식단 배분 meal_planner 는 검색 결과 행을 그대로 받으므로 FoodTable 을 쓰지 않음)
+FOOD_TABLE_IN_MEMORY = os.getenv("FOOD_TABLE_IN_MEMORY", "0") == "1"
+food_table: Optional[FoodTable] = None
+if FOOD_TABLE_IN_MEMORY:
+    try:
+        with db_pool.connection() as conn:
+            food_table = FoodTable.load(conn)
+    except Exception as e:
+        logging.warning(f"FoodTable 메모리 적재 실패, SQLite 조회를 사용합니다: {e}")
+        food_table = None
+
 # 벡터 인덱스 생성/로드 및 디버깅 함수
 def debug_rag_system():
-    """RAG 시스템 진단을 위한 테스트 함수"""
-    global DB_PATH  # 전역 변수 참조
+    """
+    RAG 시스템 심층 진단 (LLM 쿼리 포함 - 비용 발생)
+    기본 기동(FAST_BOOT)에서는 실행하지 않고 /admin/rag_diagnostic 요청 시에만 실행
+    """
     logging.info("=== RAG 시스템 진단 시작 ===")
     
     # 1. 라이브러리 버전 확인
@@ -75,16 +148,9 @@ def debug_rag_system():
         logging.error(f"인덱스 디렉토리 확인 중 오류: {e}")
         return f"디렉토리 접근 오류: {e}"
     
-    # 3. 인덱스 로드 시도
+    # 3. 인덱스 로드 시도 (이미 로드된 인덱스가 있으면 재사용, 스냅샷이 없으면 빌드하지 않음)
     try:
-        from rag_index import build_or_load, DB_PATH as RAG_DB_PATH
-        # 전역 DB_PATH 업데이트
-        global DB_PATH
-        if not DB_PATH and RAG_DB_PATH:
-            DB_PATH = RAG_DB_PATH
-            logging.info(f"DB_PATH 설정됨: {DB_PATH}")
-            
-        index = build_or_load(persist_dir=index_dir)
+        index = get_vector_index(build=False)
         
         # 로드된 인덱스 확인
         if hasattr(index, 'docstore') and hasattr(index.docstore, 'docs'):
@@ -159,7 +225,7 @@ def debug_rag_system():
                             
                             # 실제 DB에서 해당 rowid가 존재하는지 확인
                             try:
-                                with sqlite3.connect(DB_PATH) as conn:
+                                with db_pool.connection() as conn:
                                     result = conn.execute("SELECT 식품명 FROM foods WHERE rowid=?", (rowid,)).fetchone()
                                     if result:
                                         logging.info(f"DB 확인 성공: rowid={rowid}, 식품명={result[0]}")
@@ -200,78 +266,6 @@ def debug_rag_system():
     logging.info("=== RAG 시스템 진단 완료: 정상 ===")
     return "정상"
 
-# 벡터 인덱스 생성/로드
-try:
-    logging.info("RAG 인덱스 로드 시작...")
-    # DB_PATH가 정의되지 않은 경우 정의해주기
-    if 'DB_PATH' not in globals() or DB_PATH is None:
-        from rag_index import DB_PATH as RAG_DB_PATH
-        globals()['DB_PATH'] = RAG_DB_PATH
-        logging.info(f"전역 DB_PATH 설정: {DB_PATH}")
-    
-    vector_index = build_or_load()
-    logging.info("RAG 벡터 인덱스 로드 완료")
-    USE_RAG = True
-    
-    # 인덱스 상태 확인
-    rag_status = debug_rag_system()
-    logging.info(f"RAG 시스템 상태: {rag_status}")
-    USE_RAG = rag_status == "정상"
-    
-    if not USE_RAG:
-        logging.warning("RAG 시스템 진단 실패, 일반 검색만 사용합니다.")
-    
-    # 테스트 쿼리 실행
-    if USE_RAG:
-        try:
-            test_results = semantic_food_search("토마토", test_mode=True)
-            logging.info(f"RAG 테스트 쿼리 결과: {len(test_results)} 항목 찾음")
-            
-            # 결과가 없으면 추가 테스트 시도 (디버깅용)
-            if not test_results:
-                logging.warning("'토마토' 테스트 실패, '사과' 로 테스트 재시도")
-                alt_results = semantic_food_search("사과", test_mode=True)
-                logging.info(f"RAG '사과' 테스트 결과: {len(alt_results)} 항목 찾음")
-                
-                # 여전히 실패하면, 문제가 있는 것으로 확인
-                if not alt_results:
-                    logging.error("RAG 검색이 두 번 연속 실패하나 정상으로 간주하고 계속 진행")
-                    # 계속 시도해보기 위해 USE_RAG는 True로 유지
-        except Exception as e:
-            logging.error(f"RAG 테스트 쿼리 오류: {e}", exc_info=True)
-            # 오류가 발생해도 USE_RAG는 True로 유지
-            logging.info("RAG 테스트 실패했으나 정상으로 간주하고 계속 진행")
-            
-    # 관리자용 테스트 엔드포인트 추가
-    @app.get("/test_rag")
-    async def test_rag_search(term: str):
-        """
-        RAG 검색 테스트를 위한 관리자용 API
-        """
-        if not USE_RAG:
-            return {"error": "RAG 시스템이 비활성화되어 있습니다"}
-            
-        try:
-            results = semantic_food_search(term, top_k=10, test_mode=True)
-            return {
-                "status": "success",
-                "count": len(results),
-                "results": [{
-                    "name": item[0],
-                    "kcal": item[1],
-                    "carbs": item[2],
-                    "protein": item[3],
-                    "fat": item[4]
-                } for item in results]
-            }
-        except Exception as e:
-            logging.error(f"Test RAG API 오류: {e}")
-            return {"status": "error", "message": str(e)}
-            
-except Exception as e:
-    logging.warning(f"RAG 인덱스 로드 실패: {e}")
-    USE_RAG = False
-
 # ── OpenAI 설정 (키를 직접 넣거나, 환경변수 사용) ─────────────
 import os
 # dotenv 설정
@@ -284,13 +278,24 @@ API_KEY = os.getenv("OPENAI_API_KEY", "")
 if not API_KEY:
     logging.warning("환경 변수 OPENAI_API_KEY가 설정되지 않았습니다. OpenAI 기능이 작동하지 않을 수 있습니다.")
 
-client = OpenAI(api_key=API_KEY)
+async_client = AsyncOpenAI(api_key=API_KEY)   # 요청 처리 경로 (이벤트 루프를 막지 않음)
 
 # 모델 설정 - GPT-4 Turbo 사용
 MODEL_NAME = "gpt-4-turbo-preview"  # 가장 최신 GPT-4 Turbo 모델
 
-# ── DB 경로 ──────────────────────────────────────────────────
-DB_PATH = "foods.db"
+# GPT 영양 추정 결과 캐시 (nutrition_cache.db) + 동일 재료 동시 호출 방지
+nutrition_cache = NutritionCache()
+async_nutrition_flight = AsyncSingleFlight()
+
+# /recommend 응답 캐시 (정규화된 요청 + 데이터 버전 → 응답 본문)
+response_cache = ResponseCache()
+
+# /metrics 수집 시점에 읽는 캐시 통계
+register_cache_stats({
+    "embedding": embed_cache.stats,
+    "nutrition": nutrition_cache.stats,
+    "response": response_cache.stats,
+})
 
 # ── 요청 / 검증 모델 ─────────────────────────────────────────
 class MealRequest(BaseModel):
@@ -358,244 +363,481 @@ def macro_target(weight: float, goal: str) -> Dict[str, float]:
         raise ValueError(f"Unknown goal: {goal}")
 
 # ── RAG 기반 의미 검색 ────────────────────────────────────────
-def semantic_food_search(term: str, top_k=5, test_mode=False):
-    """의미 기반 식품 검색 - 벡터 인덱스 사용"""
-    if not USE_RAG:
-        logging.info(f"RAG 비활성화 상태: '{term}' 검색 건너뛐")
-        return []  # RAG가 비활성화된 경우 빈 결과 반환
-        
-    logging.info(f"RAG 의미 검색 시작: '{term}'")
-    
-    # 쿼리 엔진 생성 과정 로깅
+def get_vector_index(build: bool = True):
+    """
+    llama-index 인덱스 (처음 필요할 때 1회 로드, 스냅샷이 없으면 빌드)
+    지연 로드 모드이거나 build=False 이면 빌드하지 않음 (요청 처리 중 전체 테이블 임베딩 방지)
+    """
+    global vector_index, vector_retriever
+    if vector_index is None:
+        if (RAG_LAZY_LOAD or not build) and not os.path.exists(PERSIST_DIR):
+            # 빌드는 기동 시 또는 build_index.py 로만
+            raise RuntimeError(f"{PERSIST_DIR} 스냅샷이 없습니다 (요청 처리 중에는 인덱스를 빌드하지 않음)")
+        logging.info("RAG 인덱스 로드 시작...")
+        vector_index = build_or_load()
+        logging.info("RAG 벡터 인덱스 로드 완료")
+        vector_retriever = vector_index.as_retriever(similarity_top_k=RAG_TOP_K)
+        _retrievers[RAG_TOP_K] = vector_retriever
+        logging.info(f"RAG retriever 생성 완료 (top_k={RAG_TOP_K})")
+    return vector_index
+
+def load_rag() -> bool:
+    """
+    RAG 검색 준비
+    • CURRENT 엔진 폴더의 .npy 스냅샷을 memory‑map (llama-index 인덱스 로드 없음, 변환은 build_index.py)
+    • 엔진 스냅샷이 없거나 오래됐으면 llama-index 인덱스를 로드해 메모리에서 구성, 그것도 안 되면 retriever 단건 검색
+    """
+    global vector_engine, embed_model
     try:
-        query_engine = vector_index.as_query_engine(similarity_top_k=top_k)
-        logging.info(f"RAG 쿼리 엔진 생성 성공: {type(query_engine)}")
+        vector_engine = load_current(PERSIST_DIR, dtype=VECTOR_DTYPE)
     except Exception as e:
-        logging.error(f"RAG 쿼리 엔진 생성 실패: {e}")
-        return []
-    
-    # 쿼리 실행 과정 로깅
+        logging.warning(f"엔진 스냅샷 로드 실패, llama-index 인덱스를 로드합니다: {e}")
+        vector_engine = None
+    if vector_engine is not None and not snapshot_matches_db(vector_engine):
+        vector_engine = None
+        return False
+
     try:
-        response = query_engine.query(term)
-        logging.info(f"RAG 쿼리 응답 받음: {type(response)}")
-            
-        # 테스트 모드에서 응답 상세 로깅
-        if test_mode:
-            attrs = [attr for attr in dir(response) if not attr.startswith('_')]
-            logging.info(f"Response 속성들: {attrs}")
-            if hasattr(response, 'response'):
-                logging.info(f"Response 텍스트: {response.response[:50]}...")
+        if vector_engine is None:
+            index = get_vector_index()
+            try:
+                vector_engine = VectorEngine.from_index(index)
+            except Exception as e:
+                logging.warning(f"배치 검색 엔진 구성 실패, 단건 검색만 사용합니다: {e}")
+        # 질의는 스냅샷을 만든 것과 같은 백엔드로 임베딩해야 함 (EMBED_BACKEND 는 빌드 시 설정)
+        meta = vector_engine.meta if vector_engine is not None else {}
+        embed_model = embedder_for_meta(meta) if meta else OpenAIEmbedder()
+        configured = os.getenv("EMBED_BACKEND")
+        if configured and configured != embed_model.backend:
+            logging.warning(
+                f"EMBED_BACKEND={configured} 이지만 스냅샷은 {embed_model.backend} 로 빌드됨 - 스냅샷 백엔드를 사용합니다"
+            )
+        logging.info(f"질의 임베딩: {embed_model.backend} ({embed_model.model_id})")
     except Exception as e:
-        logging.error(f"RAG 쿼리 실행 실패: {e}", exc_info=True)
-        return []
-    
-    # 응답 검색 유무 확인
+        logging.warning(f"RAG 인덱스 로드 실패: {e}")
+        return False
+    return True
+
+def snapshot_matches_db(engine: VectorEngine) -> bool:
+    """
+    스냅샷 ↔ foods.db 버전 확인 (meta.json 의 db_version / id_scheme vs foods.db meta 테이블)
+    • 버전 동일 → 사용
+    • id 체계가 다름 → rowid 가 다른 식품을 가리킬 수 있으므로 RAG 비활성화
+    • 같은 id 체계에서 버전만 다름 → id 가 내용 기반이라 안전, DB 에 없는 식품만 결과에서 빠짐
+    """
+    db_meta = DB_META
+    if not db_meta:
+        return True         # 이전 ingest 로 만든 DB - rag_self_check 의 rowid 확인에 맡김
+
+    snap_version, db_version = engine.meta.get("db_version"), db_meta.get("db_version")
+    if snap_version == db_version:
+        return True
+    if engine.meta.get("id_scheme") != db_meta.get("id_scheme"):
+        logging.error(
+            f"스냅샷 id 체계({engine.meta.get('id_scheme')}) ≠ foods.db({db_meta.get('id_scheme')}) - "
+            "RAG 를 비활성화합니다. python build_index.py 로 스냅샷을 다시 빌드하세요"
+        )
+        return False
+
+    ids = [int(r) for r in engine.rowids]
+    missing = len(ids) - len(fetch_foods_by_rowids(ids))
+    logging.warning(
+        f"스냅샷 db_version {snap_version} ≠ foods.db {db_version} - "
+        f"DB 에 없는 식품 {missing}개는 검색 결과에서 제외됩니다 (build_index.py 로 증분 재빌드 권장)"
+    )
+    return True
+
+def ensure_rag_loaded() -> bool:
+    """RAG 를 1회만 로드하고 구조 점검까지 수행 (RAG_LAZY_LOAD 에서는 첫 검색 요청 시 호출됨)"""
+    global USE_RAG, _rag_loaded
+    if not _rag_loaded:
+        with _rag_lock:
+            if not _rag_loaded:
+                USE_RAG = load_rag()
+                if USE_RAG:
+                    rag_status = rag_self_check()
+                    logging.info(f"RAG 구조 점검: {rag_status}")
+                    USE_RAG = rag_status == "정상"
+                _rag_loaded = True
+    return USE_RAG
+
+def rag_self_check() -> str:
+    """네트워크 호출 없는 구조 점검 - 엔진 행렬/메타데이터 일관성, rowid 가 foods.db 에 존재하는지"""
+    if vector_engine is None:
+        # 엔진이 없으면 retriever 단건 검색 - 인덱스에 문서가 있는지만 확인
+        docs = getattr(getattr(vector_index, "docstore", None), "docs", None)
+        return "정상" if docs else "빈 인덱스"
+
+    if len(vector_engine) == 0:
+        return "빈 인덱스"
+    meta_count = vector_engine.meta.get("count")
+    if meta_count is not None and meta_count != len(vector_engine):
+        return f"스냅샷 메타데이터 불일치: {meta_count} != {len(vector_engine)}"
+
+    # 앞쪽 일부 행만 확인 (memory‑map 전체를 읽지 않음)
+    sample = np.asarray(vector_engine.matrix[:100], dtype=np.float32)
+    if not np.all(np.isfinite(sample)):
+        return "임베딩 값 이상"
+
+    sample_rowids = [int(r) for r in vector_engine.rowids[:100]]
     try:
-        if not hasattr(response, 'source_nodes'):
-            logging.error(f"Response에 source_nodes 속성이 없음: {type(response)}")
-            return []
-        
-        if not response.source_nodes:
-            logging.info(f"RAG 검색 결과 없음: '{term}'")
-            return []
-            
-        logging.info(f"RAG 검색 소스 노드 {len(response.source_nodes)}개 받음")
-        
-        # 가장 먼저 받은 노드 로깅
-        first_node = response.source_nodes[0]
-        if test_mode and hasattr(first_node, 'metadata'):
-            logging.info(f"첫 번째 노드 메타데이터: {first_node.metadata}")
-            
+        found = fetch_foods_by_rowids(sample_rowids)
     except Exception as e:
-        logging.error(f"RAG 쿼리 실행 실패: {e}", exc_info=True)
-        return []
-        
-    # 여기서부터 결과 추출 처리
+        return f"DB 연결 오류: {e}"
+    missing = [r for r in sample_rowids if r not in found]
+    if missing and vector_engine.meta.get("id_scheme") and len(missing) < len(sample_rowids):
+        # 내용 기반 id - 일부 식품이 DB 에서 빠졌을 뿐 다른 식품을 가리키지는 않음
+        logging.warning(f"DB에 없는 rowid {len(missing)}개 (검색 결과에서 제외): {missing[:5]}")
+    elif missing:
+        logging.error(f"DB에 없는 rowid {len(missing)}개: {missing[:5]}")
+        return "rowid 불일치 문제"
+    return "정상"
+
+def get_retriever(top_k: int = RAG_TOP_K):
+    """top_k 별 retriever 반환 (처음 요청된 top_k만 새로 생성 후 재사용)"""
+    retriever = _retrievers.get(top_k)
+    if retriever is None:
+        retriever = get_vector_index().as_retriever(similarity_top_k=top_k)
+        _retrievers[top_k] = retriever
+        logging.info(f"RAG retriever 추가 생성 (top_k={top_k})")
+    return retriever
+
+def embed_queries(terms: List[str]):
+    """질의 임베딩 - 캐시 적중 시 네트워크 호출 없이 반환, 미적중분만 1회 배치 요청"""
+    with stage("embedding"):
+        if not embed_model.cacheable:
+            # 로컬 백엔드는 캐시 조회보다 직접 계산이 빠름
+            return np.asarray(embed_model.get_text_embedding_batch([normalize_query(t) for t in terms]), dtype=np.float32)
+        return embed_with_cache(embed_cache, embed_model.model_id, terms, embed_model.get_text_embedding_batch)
+
+def rag_retrieve(term: str, top_k: int = RAG_TOP_K) -> List[Tuple[int, float]]:
+    """
+    검색 전용 RAG 조회 - 임베딩 유사도 검색만 수행하고 LLM 호출은 하지 않음
+
+    반환값: List[Tuple(rowid, score)] (유사도 내림차순)
+    """
+    # 배치 엔진이 있으면 캐시된 임베딩으로 바로 검색
+    if vector_engine is not None and embed_model is not None:
+        query = embed_queries([term])[0]
+        with stage("vector_search"):
+            return vector_engine.search(query, top_k)
+
+    nodes = get_retriever(top_k).retrieve(term)
+    hits = []
+    for i, node in enumerate(nodes):
+        metadata = getattr(node, 'metadata', None) or {}
+        if 'rowid' not in metadata:
+            logging.warning(f"노드 {i}번에 rowid 메타데이터가 없습니다")
+            continue
+        score = node.score if node.score is not None else 0.0
+        hits.append((int(metadata['rowid']), float(score)))
+    return hits
+
+def semantic_food_search(term: str, top_k=RAG_TOP_K, test_mode=False):
+    """의미 기반 식품 검색 - 벡터 인덱스 사용 (retriever, LLM 답변 합성 없음)"""
+    if not ensure_rag_loaded():
+        logging.debug("RAG 비활성화 상태: '%s' 검색 건너뜀", term)
+        return []  # RAG가 비활성화된 경우 빈 결과 반환
+
+    logging.debug("RAG 의미 검색 시작: '%s'", term)
+
     try:
-        # 결과 추출
-        results = []
-        
-        # source_nodes가 있는 경우 (llama-index 이전 버전 호환)
-        if hasattr(response, 'source_nodes') and response.source_nodes:
-            logging.info(f"source_nodes에서 {len(response.source_nodes)}개 결과 처리")
-            for i, node in enumerate(response.source_nodes):
-                # 메타데이터에서 rowid 찾기
-                if not hasattr(node, 'metadata') or 'rowid' not in node.metadata:
-                    logging.warning(f"노드 {i}번에 rowid 메타데이터가 없습니다")
-                    continue
-                    
-                rowid = node.metadata['rowid']
-                try:
-                    with sqlite3.connect(DB_PATH) as conn:
-                        row = conn.execute(
-                            "SELECT 식품명, 에너지kcal, 탄수화물g, 단백질g, 지방g FROM foods WHERE rowid=?", 
-                            (rowid,)
-                        ).fetchone()
-                        
-                        if row:
-                            food_name, kcal, carb, prot, fat = row
-                            results.append((food_name, kcal, carb, prot, fat))
-                            logging.info(f"RAG 결과: {food_name} (rowid={rowid})")
-                        else:
-                            logging.warning(f"DB에서 rowid={rowid}에 해당하는 식품을 찾을 수 없습니다.")
-                except Exception as e:
-                    logging.error(f"노드 {i}번 처리 중 오류: {e}")
-                    
-        # 최신 버전 llama-index를 위한 대체 처리 방법
-        elif hasattr(response, 'metadata') and response.metadata:
-            logging.info("응답의 metadata에서 결과 처리")
-            try:
-                # metadata에서 직접 source_nodes 추출 시도
-                if 'source_nodes' in response.metadata:
-                    for i, node in enumerate(response.metadata['source_nodes']):
-                        if 'metadata' in node and 'rowid' in node['metadata']:
-                            rowid = node['metadata']['rowid']
-                            try:
-                                with sqlite3.connect(DB_PATH) as conn:
-                                    row = conn.execute(
-                                        "SELECT 식품명, 에너지kcal, 탄수화물g, 단백질g, 지방g FROM foods WHERE rowid=?", 
-                                        (rowid,)
-                                    ).fetchone()
-                                    if row:
-                                        food_name, kcal, carb, prot, fat = row
-                                        results.append((food_name, kcal, carb, prot, fat))
-                                        logging.info(f"RAG 결과 (metadata): {food_name} (rowid={rowid})")
-                            except Exception as db_err:
-                                logging.error(f"DB 연결 오류 (metadata): {db_err}")
-            except Exception as e:
-                logging.error(f"메타데이터 처리 오류: {e}")
-                
-        # 모든 방법이 실패하면 키워드로 DB 직접 검색
-        if not results and hasattr(response, 'response'):
-            logging.info(f"RAG 결과가 없어 응답 텍스트로 검색 시도: {response.response[:30]}...")
-            try:
-                # 응답 텍스트에서 핵심 키워드 추출 (간단히 첫 단어만)
-                keyword = response.response.split()[0] if response.response else term
-                with sqlite3.connect(DB_PATH) as conn:
-                    rows = conn.execute(
-                        "SELECT 식품명, 에너지kcal, 탄수화물g, 단백질g, 지방g FROM foods WHERE 식품명 LIKE ?", 
-                        (f"%{keyword}%",)
-                    ).fetchall()
-                    if rows:
-                        for row in rows[:3]:  # 상위 3개만
-                            results.append(row)
-                            logging.info(f"키워드 '{keyword}' 응답 텍스트 기반 결과: {row[0]}")
-            except Exception as e:
-                logging.error(f"응답 텍스트 기반 검색 오류: {e}")
-                
-        logging.info(f"RAG 검색 결과: {len(results)}개 항목 찾음")
-        return results
-        
+        hits = rag_retrieve(term, top_k)
     except Exception as e:
-        logging.error(f"RAG 검색 결과 처리 중 오류: {e}", exc_info=True)
+        logging.error("RAG 검색 실행 실패: %s", e, exc_info=True)
+        return []
+
+    if not hits:
+        logging.debug("RAG 검색 결과 없음: '%s'", term)
         return []
 
+    if test_mode:
+        logging.info("RAG 검색 (rowid, score): %s", hits)
+
+    results = hydrate_rag_hits(hits)
+    logging.debug("RAG 검색 결과: %d개 항목 찾음", len(results))
+    return results
+
+def semantic_food_search_batch(terms: List[str], top_k=RAG_TOP_K) -> Dict[str, List[tuple]]:
+    """
+    여러 재료를 한 번에 의미 검색
+    1. 모든 재료 문자열을 임베딩 요청 1회로 임베딩 (캐시 적중분 제외)
+    2. 인덱스 전체와 한 번의 행렬곱으로 점수화
+    3. 전체 재료의 top_k 결과를 DB에서 한 번에 조회
+
+    반환값: Dict[재료, List[Tuple(식품명, kcal, carb, prot, fat)]]
+    """
+    if not ensure_rag_loaded():
+        return {term: [] for term in terms}
+
+    # 배치 엔진이 없으면 단건 검색으로 대체
+    if vector_engine is None or embed_model is None:
+        return {term: semantic_food_search(term, top_k) for term in terms}
+
+    uniq_terms = list(dict.fromkeys(terms))
+    logging.debug("RAG 배치 검색 시작: %d개 재료", len(uniq_terms))
+    try:
+        embeddings = embed_queries(uniq_terms)
+        with stage("vector_search"):
+            hits_per_term = vector_engine.search_batch(embeddings, top_k)
+    except Exception as e:
+        logging.error("RAG 배치 검색 실패: %s", e, exc_info=True)
+        return {term: [] for term in terms}
+
+    # 모든 재료의 검색 결과 rowid를 한 번의 쿼리로 조회
+    try:
+        rows_by_id = fetch_foods_by_rowids([rowid for hits in hits_per_term for rowid, _ in hits])
+    except Exception as e:
+        logging.error("rowid 일괄 조회 중 오류: %s", e)
+        return {term: [] for term in terms}
+
+    results = {}
+    for term, hits in zip(uniq_terms, hits_per_term):
+        results[term] = hydrate_rag_hits(hits, rows_by_id)
+        logging.debug("RAG 배치 결과: '%s' → %d개 항목", term, len(results[term]))
+    return {term: results[term] for term in terms}
+
+def fetch_foods_by_rowids(rowids: List[int]) -> Dict[int, tuple]:
+    """여러 rowid를 WHERE rowid IN (...) 한 번으로 조회 → {rowid: (식품명, kcal, carb, prot, fat)}"""
+    if food_table is not None:
+        with stage("hydration"):
+            return food_table.rows_by_rowids(rowids)
+
+    uniq = list(dict.fromkeys(rowids))
+    found = {}
+    with stage("hydration"), db_pool.connection() as conn:
+        # SQLite 바인딩 변수 개수 제한(구버전 999) 안에서 나눠 조회
+        for start in range(0, len(uniq), 900):
+            chunk = uniq[start:start + 900]
+            placeholders = ",".join("?" for _ in chunk)
+            for rowid, *row in conn.execute(
+                "SELECT rowid, 식품명, 에너지kcal, 탄수화물g, 단백질g, 지방g "
+                f"FROM foods WHERE rowid IN ({placeholders})",
+                chunk,
+            ):
+                found[rowid] = tuple(row)
+    return found
+
+def hydrate_rag_hits(hits: List[Tuple[int, float]], rows_by_id: Optional[Dict[int, tuple]] = None) -> List[tuple]:
+    """(rowid, score) 목록을 검색 순위대로 식품 영양 정보로 변환 (rows_by_id 없으면 일괄 조회)"""
+    if rows_by_id is None:
+        try:
+            rows_by_id = fetch_foods_by_rowids([rowid for rowid, _ in hits])
+        except Exception as e:
+            logging.error("rowid 일괄 조회 중 오류: %s", e)
+            return []
+
+    results = []
+    for rowid, score in hits:
+        row = rows_by_id.get(rowid)
+        if row:
+            results.append(row)
+            logging.debug("RAG 결과: %s (rowid=%d, score=%.4f)", row[0], rowid, score)
+        else:
+            logging.warning("DB에서 rowid=%d에 해당하는 식품을 찾을 수 없습니다.", rowid)
+    return results
+
 # ── 식품 검색 함수 ─────────────────────────────────────────────
-def db_rows_like(term: str):
+def db_rows_like(term: str, limit: int = DB_SEARCH_LIMIT):
     """
-    개선된 식품 검색 함수:
-    1. 전체 텍스트 검색 - 전체 문구를 한 번에 검색
-    2. 문구 부분으로 검색 - 일부 단어만 입력해도 검색
-    3. 단어 조합 검색 - 단어들의 OR 또는 AND 조합
-    
+    개선된 식품 검색 함수 - 단일 쿼리로 일치 등급(tier)을 계산해 상위 limit개만 반환
+    0. 전체 텍스트 검색 - 전체 문구가 식품명에 포함
+    1. AND 검색 - 모든 단어가 포함 (토큰 2개 이상일 때)
+    2. OR 검색 - 하나의 단어라도 포함
+
+    등급 → 식품명 길이 순으로 정렬, 같은 식품명은 가장 높은 등급 1회만
+
     반환값: List[Tuple(식품명, kcal, carb, prot, fat)]
     """
     # 입력 검색어 전처리
     term = term.strip()
     if not term:
         return []
-    
-    # 전체 텍스트 검색 (원본 문구를 그대로 검색)
-    full_results = search_foods_by_full_text(term)
-    
-    # 토큰 분리 머물어 검색
+
+    # 토큰 분리
     tokens = [t.strip() for t in re.split(r"[,\s]+", term) if t.strip()]
-    
-    # AND 검색 (1순위) - 모든 단어가 포함된 경우
-    and_results = []
-    if len(tokens) > 1:  # 토큰이 2개 이상인 경우만 AND 검색 수행
-        and_results = search_foods_with_tokens(tokens, match_type="AND")
-    
-    # 식품명 문장 토큰화 OR 검색 (2순위) - 하나의 단어라도 포함된 경우
-    or_results = search_foods_with_tokens(tokens, match_type="OR")
-    
-    # 결과 통합 및 중복 제거 (중요도 순)
-    combined_results = []
-    seen_foods = set()
-    
-    # 1. 전체 문구 정확 일치 (가장 정확한 일치)
-    for row in full_results:
-        if row[0] not in seen_foods:  # 식품명 중복 방지
-            combined_results.append(row)
-            seen_foods.add(row[0])
-    
-    # 2. 모든 토큰 포함 (AND 연산, 두 번째로 정확한 일치)
-    for row in and_results:
-        if row[0] not in seen_foods:
-            combined_results.append(row)
-            seen_foods.add(row[0])
-    
-    # 3. 일부 토큰 포함 (OR 연산, 마지막 순위)
-    for row in or_results:
-        if row[0] not in seen_foods:
-            combined_results.append(row)
-            seen_foods.add(row[0])
-    
-    # 검색 결과 로그
-    logging.info(f"검색 방식별 결과: 전체={len(full_results)}, AND={len(and_results)}, OR={len(or_results)}")
-    logging.info(f"최종 결과 수: {len(combined_results)}")
-    
-    return combined_results
 
-def search_foods_by_full_text(term: str):
-    """전체 문구를 그대로 검색"""
-    sql = (
-        "SELECT 식품명, 에너지kcal, 탄수화물g, 단백질g, 지방g "
-        "FROM foods WHERE 식품명 LIKE ? ORDER BY length(식품명) ASC"
-    )
-    with sqlite3.connect(DB_PATH) as conn:
-        rows = conn.execute(sql, [f'%{term}%']).fetchall()
-        return [
-            (
-                row[0],
-                float(row[1]),
-                float(row[2]),
-                float(row[3]),
-                float(row[4])
-            )
-            for row in rows
-        ]
+    # 전체 문구 ⊂ AND ⊂ OR 이므로 후보는 OR 조건 (FTS 인덱스 사용 가능)
+    where_clause, where_params = token_filter(tokens)
 
-def search_foods_with_tokens(tokens, match_type="AND"):
-    """토큰을 사용한 식품 검색 (AND 또는 OR 조건)"""
-    if not tokens:
-        return []
-        
-    # AND 또는 OR 조건 쿼리 동적 생성
-    operator = " AND " if match_type == "AND" else " OR "
-    where_clause = operator.join([f"식품명 LIKE '%'||?||'%'" for _ in tokens])
-    
+    tier_sql = "WHEN 식품명 LIKE '%'||?||'%' THEN 0 "
+    tier_params = [term]
+    if len(tokens) > 1:
+        tier_sql += "WHEN " + " AND ".join("식품명 LIKE '%'||?||'%'" for _ in tokens) + " THEN 1 "
+        tier_params += tokens
+
+    # 메모리 테이블이 있으면 rowid / 등급만 조회 (식품명·영양 값은 배열에서 읽음)
+    columns = "" if food_table is not None else "식품명, 에너지kcal, 탄수화물g, 단백질g, 지방g, "
     sql = (
-        "SELECT 식품명, 에너지kcal, 탄수화물g, 단백질g, 지방g "
-        f"FROM foods WHERE {where_clause} ORDER BY length(식품명) ASC"
+        f"SELECT food_rowid, {columns}MIN(tier) AS tier FROM ("
+        f"  SELECT rowid AS food_rowid, {columns or '식품명, '}CASE {tier_sql}ELSE 2 END AS tier"
+        f"  FROM foods WHERE {where_clause}"
+        ") GROUP BY 식품명 ORDER BY tier ASC, length(식품명) ASC LIMIT ?"
     )
-    
-    with sqlite3.connect(DB_PATH) as conn:
-        rows = conn.execute(sql, tokens).fetchall()
-        return [
-            (
-                row[0],
-                float(row[1]),
-                float(row[2]),
-                float(row[3]),
-                float(row[4])
-            )
-            for row in rows
-        ]
+
+    with stage("keyword_search"), db_pool.connection() as conn:
+        rows = conn.execute(sql, tier_params + where_params + [limit]).fetchall()
+
+    # 검색 결과 로그
+    if logging.getLogger().isEnabledFor(logging.DEBUG):
+        tiers = [row[-1] for row in rows]
+        logging.debug("검색 등급별 결과: 전체=%d, AND=%d, OR=%d (limit=%d)", tiers.count(0), tiers.count(1), tiers.count(2), limit)
+
+    if food_table is not None:
+        rows_by_id = food_table.rows_by_rowids(row[0] for row in rows)
+        return [rows_by_id[row[0]] for row in rows if row[0] in rows_by_id]
+
+    return [
+        (row[1], float(row[2]), float(row[3]), float(row[4]), float(row[5]))
+        for row in rows
+    ]
+
+def token_filter(tokens):
+    """
+    토큰 OR 조건 WHERE 절 생성 → (sql, params)
+    • 모든 토큰이 3글자 이상이면 FTS MATCH 로 인덱스 검색
+    • 짧은 토큰이 섞이면 인덱스를 쓸 수 없으므로 LIKE 로 검색
+    """
+    if USE_FTS and tokens and all(len(t) >= FTS_MIN_LEN for t in tokens):
+        match = " OR ".join(fts_phrase(t) for t in tokens)
+        return f"rowid IN (SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH ?)", [match]
+    return " OR ".join(["식품명 LIKE '%'||?||'%'" for _ in tokens]), list(tokens)
 
 # ── 2차: GPT-4 Turbo 추정 (100 g 기준) ───────────────────────
-def gpt_lookup_nutrition(term: str):
-    """GPT-4로 100 g 영양 추정치를 JSON(string)으로 받아 파싱."""
+async def gpt_lookup_nutrition_batch_async(terms: List[str]) -> Dict[str, Optional[tuple]]:
+    """
+    여러 재료의 GPT 영양 추정을 JSON 모드 요청 1회로 처리 (캐시 경유)
+    • 캐시 적중 재료는 제외, 다른 요청에서 추정 중인 재료는 그 결과를 공유
+    • 응답에서 형식이 잘못된 재료만 단건 요청으로 다시 추정
+
+    반환값: Dict[재료, (식품명, kcal, carb, prot, fat) 또는 None]
+    """
+    keys = {term: normalize_query(term) for term in terms}
+    results: Dict[str, Optional[tuple]] = {}
+    cached = await run_blocking(nutrition_cache.get_many, list(keys.values()))
+    for term, key in keys.items():
+        if key in cached:
+            results[term] = gpt_row(term, cached[key])
+    pending = {keys[t]: t for t in terms if t not in results}
+    if not pending:
+        return results
+
+    async def _estimate(owned_keys: List[str]) -> Dict[str, Optional[tuple]]:
+        owned_terms = [pending[k] for k in owned_keys]
+        chunks = [owned_terms[i:i + GPT_BATCH_SIZE] for i in range(0, len(owned_terms), GPT_BATCH_SIZE)]
+        estimates = {}
+        for part in await asyncio.gather(*(_estimate_chunk(chunk) for chunk in chunks)):
+            estimates.update(part)
+        await run_blocking(
+            nutrition_cache.put_many, {keys[term]: est for term, est in estimates.items() if est}, "gpt", MODEL_NAME
+        )
+        return {keys[term]: est for term, est in estimates.items()}
+
+    shared = await async_nutrition_flight.do_many(list(pending), _estimate)
+    for term in terms:
+        if term not in results:
+            results[term] = gpt_row(term, shared.get(keys[term]))
+    return results
+
+def gpt_row(term: str, est: Optional[tuple]) -> Optional[tuple]:
+    """
+    캐시·공유된 추정값의 식품명을 이 요청의 재료 표기로 교체
+    (캐시 키는 정규화 표기라 "Protein Bar" / "protein bar" 가 같은 값을 공유함)
+    """
+    if not est:
+        return None
+    return (term + " (GPT-4)", *est[1:])
+
+async def _estimate_chunk(terms: List[str]) -> Dict[str, Optional[tuple]]:
+    """
+    재료 묶음 1회 요청 → 응답 검증에 실패한 재료만 단건 요청으로 재시도
+    (API 호출 자체가 실패하면 묶음 전체를 None 으로 - 단건 재시도로 N번 다시 부르지 않음)
+    """
+    try:
+        logging.debug("GPT 영양 정보 배치 요청 - %d개: %s", len(terms), terms)
+        with stage("gpt"):
+            resp = await async_client.chat.completions.create(**nutrition_batch_request(terms))
+        record_openai("chat", resp.usage)
+    except Exception as e:
+        record_openai("chat", ok=False)
+        logging.error("GPT 배치 호출 오류 - %s: %s", terms, e)
+        return {term: None for term in terms}
+
+    estimates: Dict[str, Optional[tuple]] = parse_nutrition_batch_response(terms, resp.choices[0].message.content)
+    retry = [term for term in terms if not estimates.get(term)]
+    if retry:
+        logging.warning("GPT 배치 응답 검증 실패, 단건 재시도: %s", retry)
+        for term, est in zip(retry, await asyncio.gather(*(_estimate_single(t) for t in retry))):
+            estimates[term] = est
+    return estimates
+
+async def _estimate_single(term: str):
+    try:
+        with stage("gpt"):
+            resp = await async_client.chat.completions.create(**nutrition_request(term))
+        record_openai("chat", resp.usage)
+        return parse_nutrition_response(term, resp.choices[0].message.content)
+    except Exception as e:
+        record_openai("chat", ok=False)
+        logging.error("GPT 호출 오류 - %s: %s", term, e)
+        return None
+
+def nutrition_batch_request(terms: List[str]) -> Dict:
+    """여러 재료 영양 추정 chat completion 요청 파라미터 (재료명 → 영양 객체 JSON)"""
+    sys_msg = (
+        "You are a nutrition database specialist. "
+        "Return ONLY a JSON object whose keys are the given food names, exactly as written, "
+        "and whose values are objects with numeric keys "
+        "'kcal', 'carb', 'prot', 'fat' for 100 g of that food. "
+        "Ensure all values are reasonable and accurate for the specified food."
+    )
+    prompt = f"Foods: {json.dumps(terms, ensure_ascii=False)}\nJSON:"
+    return dict(
+        model=MODEL_NAME,
+        messages=[
+            {"role": "system", "content": sys_msg},
+            {"role": "user", "content": prompt},
+        ],
+        temperature=0.1,
+        response_format={"type": "json_object"}
+    )
+
+def parse_nutrition_batch_response(terms: List[str], resp: str) -> Dict[str, tuple]:
+    """배치 응답 → 검증을 통과한 재료만 {재료: (식품명, kcal, carb, prot, fat)}"""
+    try:
+        data = json.loads(resp)
+    except (TypeError, json.JSONDecodeError) as e:
+        logging.error("배치 JSON 파싱 오류: %s, 원본 응답: %s", e, resp)
+        return {}
+    if not isinstance(data, dict):
+        return {}
+
+    # 모델이 키를 약간 바꿔 쓰는 경우(공백·대소문자)를 위해 정규화 키로도 조회
+    by_norm = {normalize_query(str(k)): v for k, v in data.items()}
+    parsed = {}
+    for term in terms:
+        entry = data.get(term, by_norm.get(normalize_query(term)))
+        macros = valid_macros(entry)
+        if macros:
+            parsed[term] = (term + " (GPT-4)", *macros)
+        else:
+            logging.warning("GPT 배치 항목 검증 실패 - %s: %s", term, entry)
+    return parsed
+
+def valid_macros(entry) -> Optional[Tuple[float, float, float, float]]:
+    """{'kcal','carb','prot','fat'} 가 모두 0 이상 유한한 수치인 경우만 (kcal, carb, prot, fat)"""
+    if not isinstance(entry, dict):
+        return None
+    try:
+        values = tuple(float(entry[k]) for k in ("kcal", "carb", "prot", "fat"))
+    except (KeyError, TypeError, ValueError):
+        return None
+    if not all(math.isfinite(v) and v >= 0 for v in values):
+        return None
+    return values
+
+def nutrition_request(term: str) -> Dict:
+    """영양 추정 chat completion 요청 파라미터"""
     sys_msg = (
         "You are a nutrition database specialist. "
         "Return ONLY a JSON object with numeric keys "
@@ -603,51 +845,171 @@ def gpt_lookup_nutrition(term: str):
         "Ensure all values are reasonable and accurate for the specified food."
     )
     prompt = f"Food: {term}\nJSON:"
+    return dict(
+        model=MODEL_NAME,  # GPT-4 Turbo 사용
+        messages=[
+            {"role": "system", "content": sys_msg},
+            {"role": "user", "content": prompt},
+        ],
+        temperature=0.1,  # 더 일관된 응답을 위해 낮은 temperature
+        response_format={"type": "json_object"}  # JSON 응답 강제
+    )
+
+def parse_nutrition_response(term: str, resp: str):
+    """GPT 응답(JSON 문자열) → (식품명, kcal, carb, prot, fat), 실패 시 None"""
+    # JSON 파싱
     try:
-        logging.info(f"GPT 영양 정보 요청 - 음식: {term}")
-        resp = client.chat.completions.create(
-            model=MODEL_NAME,  # GPT-4 Turbo 사용
-            messages=[
-                {"role": "system", "content": sys_msg},
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0.1,  # 더 일관된 응답을 위해 낮은 temperature
-            response_format={"type": "json_object"}  # JSON 응답 강제
-        ).choices[0].message.content
-        
-        # JSON 파싱
+        data = json.loads(resp)
+        logging.debug("GPT 영양 정보 결과 - %s: %s", term, data)
+        return (
+            term + " (GPT-4)",  # 식품명 구분용
+            float(data.get("kcal", 0)),
+            float(data.get("carb", 0)),
+            float(data.get("prot", 0)),
+            float(data.get("fat", 0)),
+        )
+    except json.JSONDecodeError as e:
+        logging.error(f"JSON 파싱 오류: {e}, 원본 응답: {resp}")
+        # 정규식으로 재시도
         try:
-            data = json.loads(resp)
-            logging.info(f"GPT 영양 정보 결과 - {term}: {data}")
-            return (
-                term + " (GPT-4)",  # 식품명 구분용
-                float(data.get("kcal", 0)),
-                float(data.get("carb", 0)),
-                float(data.get("prot", 0)),
-                float(data.get("fat", 0)),
-            )
-        except json.JSONDecodeError as e:
-            logging.error(f"JSON 파싱 오류: {e}, 원본 응답: {resp}")
-            # 정규식으로 재시도
-            try:
-                match = re.search(r"\{.*\}", resp, re.S)
-                if match:
-                    data = json.loads(match.group())
-                    return (
-                        term + " (GPT-4)",
-                        float(data.get("kcal", 0)),
-                        float(data.get("carb", 0)),
-                        float(data.get("prot", 0)),
-                        float(data.get("fat", 0)),
-                    )
-            except Exception as nested_err:
-                logging.error(f"정규식 파싱 시도 실패: {nested_err}")
-            return None
-    except Exception as e:
-        logging.error(f"GPT 호출 오류 - {term}: {e}")
+            match = re.search(r"\{.*\}", resp, re.S)
+            if match:
+                data = json.loads(match.group())
+                return (
+                    term + " (GPT-4)",
+                    float(data.get("kcal", 0)),
+                    float(data.get("carb", 0)),
+                    float(data.get("prot", 0)),
+                    float(data.get("fat", 0)),
+                )
+        except Exception as nested_err:
+            logging.error(f"정규식 파싱 시도 실패: {nested_err}")
         return None
+    except (TypeError, ValueError, AttributeError) as e:
+        logging.error(f"GPT 영양 값 변환 오류 - {term}: {e}, 원본 응답: {resp}")
+        return None
+
+# ── 비동기 재료 해석 파이프라인 (RAG → DB → GPT) ───────────────
+# SQLite·llama-index 같은 블로킹 작업은 전용 스레드 풀에서 실행하고
+# 재료들은 세마포어로 동시 처리 개수를 제한해 병렬로 해석
+RESOLVE_CONCURRENCY = int(os.getenv("RESOLVE_CONCURRENCY", "8"))
+RAG_TIMEOUT = float(os.getenv("RAG_TIMEOUT", "10"))   # 초, 재료 전체 배치 검색
+DB_TIMEOUT  = float(os.getenv("DB_TIMEOUT", "5"))     # 초, 재료 1개 키워드 검색
+GPT_TIMEOUT = float(os.getenv("GPT_TIMEOUT", "20"))   # 초, GPT 배치 추정
+GPT_BATCH_SIZE = int(os.getenv("GPT_BATCH_SIZE", "20"))  # GPT 요청 1회당 최대 재료 수
+
+blocking_executor = ThreadPoolExecutor(max_workers=POOL_SIZE, thread_name_prefix="blocking")
+_resolve_semaphore: Optional[asyncio.Semaphore] = None
+
+async def run_blocking(fn, *args):
+    """블로킹 함수를 스레드 풀에서 실행"""
+    loop = asyncio.get_running_loop()
+    # 요청 컨텍스트(로그 샘플링·요약 필드)를 작업 스레드로 전달 (run_in_executor 는 contextvars 를 복사하지 않음)
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(blocking_executor, functools.partial(ctx.run, fn, *args))
+
+def get_resolve_semaphore() -> asyncio.Semaphore:
+    # 실행 중인 이벤트 루프 안에서 생성 (Python 3.9 의 루프 바인딩 문제 방지)
+    global _resolve_semaphore
+    if _resolve_semaphore is None:
+        _resolve_semaphore = asyncio.Semaphore(RESOLVE_CONCURRENCY)
+    return _resolve_semaphore
+
+async def run_stage(stage: str, term: str, awaitable, timeout: float, default):
+    """단계별 timeout - 초과하거나 실패하면 default 로 다음 단계 진행"""
+    try:
+        return await asyncio.wait_for(awaitable, timeout)
+    except asyncio.TimeoutError:
+        logging.warning("%s 단계 시간 초과 (%ss): '%s'", stage, timeout, term)
+    except Exception as e:
+        logging.error("%s 단계 오류: '%s': %s", stage, term, e)
+    return default
+
+async def resolve_ingredient(term: str, rag_rows: List[tuple]) -> Dict:
+    """
+    재료 1개 해석 (RAG → DB) → {"term", "source": 'rag'|'db'|None, "rows"}
+    (RAG 결과는 resolve_ingredients 에서 배치로 미리 조회해 전달, GPT 는 남은 재료를 모아 배치 처리)
+    """
+    if rag_rows:
+        return {"term": term, "source": "rag", "rows": rag_rows}
+
+    async with get_resolve_semaphore():
+        # 2. RAG 실패 시 키워드 기반 DB 검색
+        logging.debug("RAG 검색 실패, DB 키워드 검색 시도: '%s'", term)
+        rows = await run_stage("DB", term, run_blocking(db_rows_like, term), DB_TIMEOUT, [])
+    if rows:
+        return {"term": term, "source": "db", "rows": rows}
+    return {"term": term, "source": None, "rows": []}
+
+async def resolve_ingredients(terms: List[str]) -> List[Dict]:
+    """모든 재료를 동시에 해석 - 지연 시간은 가장 느린 재료 1개 수준 (결과는 terms 순서)"""
+    by_term = {}
+    async for res in iter_resolutions(terms):
+        by_term[res["term"]] = res
+    return [by_term[term] for term in terms]
+
+async def iter_resolutions(terms: List[str]) -> AsyncIterator[Dict]:
+    """
+    재료 해석 결과를 준비되는 순서대로 생성 (스트리밍 응답용, resolve_ingredients 도 이 순서로 수집)
+    RAG 적중 재료 → DB 키워드 검색이 끝난 재료 (완료 순) → GPT 배치 추정 재료
+    """
+    # 1단계 RAG 검색은 모든 재료를 한 번에 임베딩/검색
+    rag_results = {}
+    if USE_RAG or not _rag_loaded:
+        rag_results = await run_stage(
+            "RAG", ",".join(terms), run_blocking(semantic_food_search_batch, terms), RAG_TIMEOUT, {}
+        )
+    tasks = [asyncio.ensure_future(resolve_ingredient(term, rag_results.get(term, []))) for term in terms]
+
+    # 2. 해석된 재료는 바로 내보내고, DB 검색도 실패한 재료만 모아 둠
+    unresolved = []
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            res = await next_done
+            if res["rows"]:
+                RESOLVE_SOURCE.inc(res["source"])
+                yield res
+            else:
+                unresolved.append(res)
+    finally:
+        # 소비자가 중간에 멈추면 (스트리밍 클라이언트 연결 끊김) 남은 DB 검색 취소
+        for task in tasks:
+            task.cancel()
+
+    # 3. 남은 재료는 모아서 GPT 요청 1회로 영양소 예측
+    if unresolved:
+        pending = list(dict.fromkeys(res["term"] for res in unresolved))
+        logging.debug("DB 검색 실패, GPT 영양소 배치 예측 시도: %s", pending)
+        estimates = await run_stage(
+            "GPT", ",".join(pending), gpt_lookup_nutrition_batch_async(pending), GPT_TIMEOUT, {}
+        )
+        for res in unresolved:
+            est = estimates.get(res["term"])
+            if est:
+                res.update(source="gpt", rows=[est])
+            RESOLVE_SOURCE.inc(res["source"] or "none")
+            yield res
 
 # ── 오류 응답 헬퍼 ─────────────────────────────────────────────
+def data_version() -> str:
+    """응답에 영향을 주는 데이터/설정 버전 - 바뀌면 이전 캐시 항목은 더 이상 적중하지 않음"""
+    engine_meta = vector_engine.meta if vector_engine is not None else {}
+    return "|".join(str(v) for v in (
+        DB_META.get("db_version"),
+        engine_meta.get("version"),
+        engine_meta.get("db_version"),
+        embed_model.model_id if embed_model is not None else None,
+        USE_RAG,
+        MODEL_NAME,
+    ))
+
+def cached_json_response(request: Request, body: bytes, etag: str) -> Response:
+    """캐시된 본문 응답 - If-None-Match 가 ETag 와 같으면 본문 없이 304"""
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        response_cache.record_not_modified()
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json; charset=utf-8", headers={"ETag": etag})
+
 def error_response(status_code: int, message: str) -> JSONResponse:
     return JSONResponse(
         status_code=status_code,
@@ -661,179 +1023,184 @@ def error_response(status_code: int, message: str) -> JSONResponse:
 # ── 요청 로그 미들웨어 ────────────────────────────────────────
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
-    logging.info(f"요청: {request.method} {request.url.path}")
+    # 요청/응답 로그는 요청당 요약 레코드 1개 (핸들러가 annotate 로 필드 추가)
+    ctx = start_request(request.method, request.url.path)
+    t0 = time.perf_counter()
     try:
         response = await call_next(request)
-        logging.info(f"응답: {response.status_code}")
-        return response
     except Exception as e:
-        logging.error(f"처리 중 오류: {str(e)}")
-        return error_response(500, str(e))
+        logging.error("처리 중 오류: %s", e)
+        response = error_response(500, str(e))
+    elapsed = time.perf_counter() - t0
+    # 라벨은 경로 템플릿 (매칭 안 된 경로는 하나로 묶어 라벨 종류가 늘지 않게)
+    route = request.scope.get("route")
+    HTTP_SECONDS.observe(elapsed, request.method, getattr(route, "path", "unmatched"), str(response.status_code))
+    log_request_summary(ctx, response.status_code, elapsed)
+    return response
 
 # ── 엔드포인트 ───────────────────────────────────────────────
 @app.post("/recommend")
-async def recommend(req: MealRequest):
-    logging.info(f"식단 추천 요청: 재료={req.ingredients}, 체중={req.weight}, 목표={req.goal}, 식사 수={req.meals}")
+async def recommend(req: MealRequest, request: Request):
+    logging.debug("식단 추천 요청: 재료=%s, 체중=%s, 목표=%s, 식사 수=%s", req.ingredients, req.weight, req.goal, req.meals)
+    annotate(ingredients=len(req.ingredients), goal=req.goal, meals=req.meals)
     # 목표 유효성 확인 추가 - bulk, diet, maintain 중 하나인지 확인
     if req.goal not in ['bulk', 'diet', 'maintain']:
         return error_response(400, f"잘못된 목표 값: {req.goal}. 'bulk', 'diet', 'maintain' 중 하나를 입력해야 합니다.")
-    
+
+    # 재료는 요청 순서대로 검색·배분, 캐시 키도 같은 목록으로 (표기가 다르면 결과가 다를 수 있음)
+    ingredients = request_ingredients(req.ingredients)
+    cache_key = None
+    if response_cache.enabled:
+        cache_key = canonical_key(ingredients, req.weight, req.goal, req.meals, data_version())
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            annotate(cache="hit")
+            return cached_json_response(request, *cached)
+        annotate(cache="miss")
+
     try:
         found, synthetic, not_found = [], [], []
+        sources: Dict[str, int] = {}
+
+        # 재료별 3단계 검색 프로세스: RAG → DB → GPT (재료 간 병렬)
+        for res in await resolve_ingredients(ingredients):
+            term, rows = res["term"], res["rows"]
+            if res["source"] == "gpt":
+                synthetic.extend(rows)
 
-        # 재료별 3단계 검색 프로세스: RAG → DB → GPT
-        for term in req.ingredients:
-            # 1. RAG 의미 기반 검색 (가장 먼저 시도)
-            rows = semantic_food_search(term) if USE_RAG else []
-            
-            # 2. RAG 실패 시 키워드 기반 DB 검색
-            if not rows:
-                logging.info(f"RAG 검색 실패, DB 키워드 검색 시도: '{term}'")
-                rows = db_rows_like(term)
-                
-            # 3. DB 검색도 실패 시 GPT로 영양소 예측
-            if not rows:
-                logging.info(f"DB 검색 실패, GPT 영양소 예측 시도: '{term}'")
-                est = gpt_lookup_nutrition(term)
-                if est:
-                    synthetic.append(est)
-                    rows = [est]
-                    
             # 결과 처리
             if rows:
                 found.extend(rows)
-                logging.info(f"'{term}' 검색 성공: {len(rows)}개 항목 찾음")
+                sources[res["source"]] = sources.get(res["source"], 0) + 1
+                logging.debug("'%s' 검색 성공 (%s): %d개 항목 찾음", term, res["source"], len(rows))
             else:
                 not_found.append(term)
-                logging.warning(f"'{term}' 검색 실패: 모든 방법에서 결과 없음")
+                logging.warning("'%s' 검색 실패: 모든 방법에서 결과 없음", term)
+        annotate(sources=sources, not_found=len(not_found))
 
         if not found:                                      # 완전 실패
-            logging.warning(f"모든 재료를 찾지 못함: {not_found}")
+            logging.warning("모든 재료를 찾지 못함: %s", not_found)
             return error_response(404, f"다음 재료를 찾지 못했습니다: {not_found}")
 
-        # ---------- 중복 제거 (같은 식품명은 1회만) ----------
-        uniq = list({r[0]: r for r in found}.values())
-
         # ---------- 목표치 ----------
         tgt = macro_target(req.weight, req.goal)
 
-        # ---------- 단순 비율 배분 ----------
-        # 100 g 씩 우선 배정 후, 남은 열량을 kcal 비중에 따라 가중 분배
-        plan   = []
-        remain = tgt["kcal"]
-        for n, kcal, c, p, f in uniq:
-            base = 100                                    # 최소치 100 g
-            plan.append({
-                "식품": n,
-                "g": base,
-                "kcal": float(kcal),
-                "탄수": float(c),
-                "단백": float(p),
-                "지방": float(f)
-            })
-            remain -= float(kcal)
-
-        if remain > 0:                                    # 남은 kcal 분배
-            total_kcal = sum(item["kcal"] for item in plan)
-            for item in plan:
-                share    = remain * item["kcal"] / total_kcal
-                extra_g  = share / item["kcal"] * 100      # 100 g당 kcal
-                item["g"]     += round(extra_g, 1)
-                item["kcal"]  += round(share, 1)
-                item["탄수"]  += round(item["탄수"] * extra_g / 100, 1)
-                item["단백"]  += round(item["단백"] * extra_g / 100, 1)
-                item["지방"]  += round(item["지방"] * extra_g / 100, 1)
-
-        # ---------- 끼니별 균등 분할 ----------
-        per_meal = []
-        for m in range(req.meals):
-            meal_items = []
-            for food in plan:
-                g_part = round(food["g"] / req.meals, 1)
-                meal_items.append({"식품": food["식품"], "g": g_part})
-            # 영양 합산
-            kcal = sum(round(food["kcal"] / req.meals, 1) for food in plan)
-            c    = sum(round(food["탄수"] / req.meals, 1) for food in plan)
-            p    = sum(round(food["단백"] / req.meals, 1) for food in plan)
-            f    = sum(round(food["지방"] / req.meals, 1) for food in plan)
-            per_meal.append({"재료": meal_items, "kcal": kcal, "c": c, "p": p, "f": f})
-
-        # ---------- 마크다운 표 (이전 버전 호환성) ----------
+        # ---------- 배분 / 끼니 분할 (중복 식품명 제거, 100 g 배정 후 남은 열량 비례 분배) ----------
         period = 1  # 기간이 필요한 경우 req에 추가
-        all_days_md = []
-        
-        # ---------- 구조화된 JSON 데이터 ----------
-        structured_days = []
-    
-        for day in range(1, period+1):
-            # 마크다운용
-            table = [
-                f"### {day}일차",
-                "| 식사 | 음식명 | g | kcal | 탄수 | 단백 | 지방 |",
-                "|:---:|:------|---:|-----:|-----:|-----:|-----:|"
-            ]
-            
-            # 구조화된 JSON용
-            day_meals = []
-            meal_types = ['아침', '점심', '저녁', '간식']
-        
-            for m_idx, meal in enumerate(per_meal, 1):
-                meal_type = meal_types[(m_idx - 1) % len(meal_types)]
-                
-                for x in meal["재료"]:
-                    # 마크다운 테이블 행 추가
-                    table.append(f"| {m_idx} | {x['식품']} | {x['g']} | {round(meal['kcal'],1)} | {round(meal['c'],1)} | {round(meal['p'],1)} | {round(meal['f'],1)} |")
-                    
-                    # 구조화된 JSON 객체 추가
-                    day_meals.append({
-                        "meal_type": meal_type,
-                        "food_name": x['식품'],
-                        "amount": float(x['g']), 
-                        "calories": float(round(meal['kcal'],1)),
-                        "carbs": float(round(meal['c'],1)),
-                        "protein": float(round(meal['p'],1)), 
-                        "fat": float(round(meal['f'],1))
-                    })
-                
-            all_days_md.append("\n".join(table))
-            structured_days.append({
-                "day": day,
-                "meals": day_meals
-            })
-            
-        meals_markdown = "\n\n".join(all_days_md)
+        with stage("planning"):
+            plan = plan_meals(found, tgt["kcal"], req.meals, period)
 
-        # 클라이언트에 맞게 구조화된 데이터 구성
-        # 식사 데이터 변환 - 클라이언트 예상 형식으로 맞춤
-        client_formatted_meals = []
-        
-        # 식사 타입별로 포맷팅
-        for day_meal in structured_days:
-            client_formatted_meals.extend(day_meal['meals'])
-        
-        logging.info(f"추천 결과 생성 완료: {len(client_formatted_meals)}개 식단 항목")
-        
-        # UTF-8로 명시적 인코딩 설정한 응답 반환
-        return JSONResponse(
-            content={
-                "success": True,
-                "meals": client_formatted_meals,
-                # 원본 마크다운도 포함 (이전 버전 호환성)
-                "rawMarkdown": meals_markdown
-            },
-            media_type="application/json; charset=utf-8"
-        )
+        with stage("serialization"):
+            content = recommendation_content(plan)
+            # UTF-8로 명시적 인코딩 설정한 응답 반환
+            response = JSONResponse(content=content, media_type="application/json; charset=utf-8")
+        annotate(items=len(content["meals"]))
+        # 일부 재료를 찾지 못한 응답은 일시적 오류(GPT 실패 등)일 수 있으므로 캐시하지 않음
+        if cache_key is not None and not not_found:
+            etag = response_cache.put(cache_key, response.body)
+            return cached_json_response(request, response.body, etag)
+        return response
         
     except Exception as e:
-        logging.error(f"추천 처리 중 오류: {str(e)}")
+        logging.error("추천 처리 중 오류: %s", e)
         return error_response(500, f"식단 추천 생성 중 오류가 발생했습니다: {str(e)}")
 
+def recommendation_content(plan) -> Dict:
+    """식단 → /recommend 응답 본문 (클라이언트 예상 형식 + 마크다운 표)"""
+    return {
+        "success": True,
+        "meals": plan.items(),
+        # 원본 마크다운도 포함 (이전 버전 호환성)
+        "rawMarkdown": plan.markdown()
+    }
+
+# ── 스트리밍 추천 ─────────────────────────────────────────────
+# 재료 해석 결과를 준비되는 대로 보내고 마지막에 식단 (GPT 추정을 기다리지 않고 부분 결과 표시)
+#   기본:                     NDJSON (application/x-ndjson) - 한 줄에 이벤트 JSON 1개
+#   Accept: text/event-stream SSE - "event: <type>" + "data: <JSON>"
+# 이벤트 순서: start → ingredient × 재료 수 (해석 완료 순) → plan 또는 error
+@app.post("/recommend/stream")
+async def recommend_stream(req: MealRequest, request: Request):
+    sse = "text/event-stream" in request.headers.get("accept", "")
+    annotate(ingredients=len(req.ingredients), goal=req.goal, meals=req.meals, stream="sse" if sse else "ndjson")
+    return StreamingResponse(
+        recommend_events(req, request_ingredients(req.ingredients), sse),
+        media_type="text/event-stream; charset=utf-8" if sse else "application/x-ndjson; charset=utf-8",
+        # 프록시(nginx 등)가 모아서 보내지 않도록
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+async def recommend_events(req: MealRequest, ingredients: List[str], sse: bool):
+    """스트리밍 이벤트 생성 - 식단은 /recommend 와 같은 재료 순서로 계산 (같은 요청 → 같은 식단, 응답 캐시 공유)"""
+    yield encode_event({"type": "start", "ingredients": ingredients, "target": macro_target(req.weight, req.goal)}, sse)
+
+    cache_key = None
+    if response_cache.enabled:
+        cache_key = canonical_key(ingredients, req.weight, req.goal, req.meals, data_version())
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            yield encode_event({"type": "plan", "cached": True, **json.loads(cached[0])}, sse)
+            return
+
+    try:
+        rows_by_term: Dict[str, List[tuple]] = {}
+        not_found = []
+        async for res in iter_resolutions(ingredients):
+            term, rows = res["term"], res["rows"]
+            if rows:
+                rows_by_term[term] = rows
+            else:
+                not_found.append(term)
+                logging.warning("'%s' 검색 실패: 모든 방법에서 결과 없음", term)
+            yield encode_event({
+                "type": "ingredient",
+                "term": term,
+                "source": res["source"],
+                "foods": [
+                    {"food_name": r[0], "calories": r[1], "carbs": r[2], "protein": r[3], "fat": r[4]}
+                    for r in rows
+                ],
+            }, sse)
+
+        found = [row for term in ingredients for row in rows_by_term.get(term, [])]
+        if not found:
+            yield encode_event({
+                "type": "error", "success": False, "status": 404,
+                "errorMessage": f"다음 재료를 찾지 못했습니다: {not_found}",
+            }, sse)
+            return
+
+        tgt = macro_target(req.weight, req.goal)
+        with stage("planning"):
+            plan = plan_meals(found, tgt["kcal"], req.meals, 1)
+        with stage("serialization"):
+            content = recommendation_content(plan)
+            if cache_key is not None and not not_found:
+                response_cache.put(cache_key, JSONResponse(content=content).body)
+        yield encode_event({"type": "plan", "not_found": not_found, **content}, sse)
+    except Exception as e:
+        logging.error("스트리밍 추천 처리 중 오류: %s", e)
+        yield encode_event({
+            "type": "error", "success": False, "status": 500,
+            "errorMessage": f"식단 추천 생성 중 오류가 발생했습니다: {str(e)}",
+        }, sse)
+
+def encode_event(event: Dict, sse: bool) -> bytes:
+    data = json.dumps(event, ensure_ascii=False, separators=(",", ":"))
+    if sse:
+        return f"event: {event['type']}\ndata: {data}\n\n".encode("utf-8")
+    return (data + "\n").encode("utf-8")
+
 # ── 상태 확인 엔드포인트 ───────────────────────────────────
 @app.get("/health")
 async def health_check():
     features = {
         "rag_enabled": USE_RAG,
-        "gpt_enabled": API_KEY is not None and len(API_KEY) > 0
+        "embed_backend": embed_model.backend if embed_model is not None else None,
+        "gpt_enabled": API_KEY is not None and len(API_KEY) > 0,
+        "embed_cache": embed_cache.stats(),
+        "nutrition_cache": nutrition_cache.stats(),
+        "response_cache": response_cache.stats(),
     }
     return {
         "status": "healthy", 
@@ -841,4 +1208,75 @@ async def health_check():
         "features": features
     }
 
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus 텍스트 형식 - 단계별 지연 히스토그램, 재료 해석 단계 횟수, 캐시 적중률, OpenAI 토큰"""
+    return Response(content=render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# ── 관리자용 엔드포인트 ──────────────────────────────────────
+@app.get("/test_rag")
+async def test_rag_search(term: str):
+    """
+    RAG 검색 테스트를 위한 관리자용 API
+    """
+    if not USE_RAG:
+        return {"error": "RAG 시스템이 비활성화되어 있습니다"}
+
+    try:
+        results = await run_blocking(functools.partial(semantic_food_search, term, top_k=10, test_mode=True))
+        return {
+            "status": "success",
+            "count": len(results),
+            "results": [{
+                "name": item[0],
+                "kcal": item[1],
+                "carbs": item[2],
+                "protein": item[3],
+                "fat": item[4]
+            } for item in results]
+        }
+    except Exception as e:
+        logging.error(f"Test RAG API 오류: {e}")
+        return {"status": "error", "message": str(e)}
+
+def require_admin(token: Optional[str]) -> None:
+    """ADMIN_TOKEN 미설정이면 404 (엔드포인트 비활성화), 헤더 값이 다르면 403"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not token or not hmac.compare_digest(token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="관리자 토큰이 올바르지 않습니다")
+
+@app.get("/admin/rag_diagnostic")
+async def rag_diagnostic(x_admin_token: Optional[str] = Header(None)):
+    """
+    RAG 심층 진단 (라이브러리·인덱스 로드·LLM 쿼리·rowid 확인) - 호출 시 OpenAI 비용 발생
+    X-Admin-Token 헤더가 ADMIN_TOKEN 과 같아야 실행
+    """
+    require_admin(x_admin_token)
+    await run_blocking(ensure_rag_loaded)
+    if vector_engine is None and vector_index is None:
+        # 로드된 인덱스가 없음 - 진단을 위해 인덱스를 빌드하지 않음
+        raise HTTPException(status_code=503, detail="RAG 인덱스가 로드되지 않았습니다")
+    structural = await run_blocking(rag_self_check)
+    deep = await run_blocking(debug_rag_system)
+    return {"self_check": structural, "diagnostic": deep, "rag_enabled": USE_RAG}
+
+# ── 기동 시 RAG 초기화 ────────────────────────────────────────
+if RAG_LAZY_LOAD:
+    # 첫 검색 요청 때 로드 - 스냅샷 폴더가 없으면 로드 완료(비활성화)로 표시해 요청 중 빌드하지 않음
+    USE_RAG = os.path.exists(PERSIST_DIR)
+    _rag_loaded = not USE_RAG
+    logging.info(f"RAG 지연 로드 모드 (첫 검색 시 로드, 스냅샷 존재: {USE_RAG})")
+else:
+    # 로드 + 네트워크 호출 없는 구조 점검 (ensure_rag_loaded)
+    USE_RAG = ensure_rag_loaded()
+    if USE_RAG and not FAST_BOOT:
+        # 기존 방식 - 기동 시 LLM 쿼리를 포함한 심층 진단
+        rag_status = debug_rag_system()
+        logging.info(f"RAG 시스템 상태: {rag_status}")
+        USE_RAG = rag_status == "정상"
+
+    if not USE_RAG:
+        logging.warning("RAG 시스템 진단 실패, 일반 검색만 사용합니다.")
+
 # ─────────────────────────────────────────────────────────────
@@ -0,0 +1,94 @@
+# ── bench/ann_recall.py ───────────────────────────────────────
+# IVF 근사 검색 recall / 지연 측정 (전수 검색 대비)
+#
+#   python bench/ann_recall.py                         # storage/ 현재 스냅샷 (IVF 없으면 메모리에서 학습)
+#   python bench/ann_recall.py --synthetic 200000      # 합성 데이터 (20만 행, 클러스터 구조)
+#   python bench/ann_recall.py --nprobe 1 4 8 16 32    # 측정할 nprobe 목록
+#
+# 질의는 문서 벡터에 잡음을 더해 만든다 (네트워크 호출 없음).
+import argparse
+import os
+import sys
+import time
+from typing import List, Tuple
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ivf_index import IVFIndex, default_nlist          # noqa: E402
+from vector_engine import VectorEngine, engine_dir_for  # noqa: E402
+
+
+def synthetic_engine(count: int, dim: int, clusters: int, seed: int) -> VectorEngine:
+    """클러스터 구조가 있는 정규화 임베딩 (실제 임베딩처럼 고르게 퍼지지 않은 분포)"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, count)
+    matrix = centers[labels] + 0.6 * rng.standard_normal((count, dim)).astype(np.float32)
+    return VectorEngine(matrix, np.arange(count, dtype=np.int64))
+
+
+def make_queries(engine: VectorEngine, n: int, noise: float, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed + 1)
+    base = np.asarray(engine.matrix[np.sort(rng.choice(len(engine), n, replace=False))], dtype=np.float32)
+    return base + noise * rng.standard_normal(base.shape).astype(np.float32) / np.sqrt(engine.dim)
+
+
+def timed(engine: VectorEngine, queries: np.ndarray, k: int, exact: bool) -> Tuple[List[List[int]], np.ndarray]:
+    """질의 1개씩 검색 (서빙의 재료 단건 검색과 같은 조건) → (rowid 목록, 질의별 ms)"""
+    results, times = [], []
+    for q in queries:
+        t0 = time.perf_counter()
+        hits = engine.search_batch(q[None, :], k, exact=exact)[0]
+        times.append((time.perf_counter() - t0) * 1000)
+        results.append([rowid for rowid, _ in hits])
+    return results, np.array(times)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="IVF recall / 지연 벤치마크")
+    parser.add_argument("--persist-dir", default="storage")
+    parser.add_argument("--synthetic", type=int, default=0, help="합성 데이터 행 수 (0 이면 스냅샷 사용)")
+    parser.add_argument("--dim", type=int, default=256, help="합성 데이터 차원")
+    parser.add_argument("--nlist", type=int, default=0, help="스냅샷에 IVF 가 없을 때 학습할 클러스터 수")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--noise", type=float, default=0.5, help="질의 잡음 크기 (문서 벡터 대비)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        engine = synthetic_engine(args.synthetic, args.dim, max(8, args.synthetic // 500), args.seed)
+        source = f"합성 {args.synthetic}행 × {args.dim}차원"
+    else:
+        engine_dir = engine_dir_for(args.persist_dir)
+        engine = VectorEngine.load(engine_dir)
+        source = engine_dir
+
+    if engine.ivf is None:
+        nlist = args.nlist or default_nlist(len(engine))
+        ivf, order = IVFIndex.train(engine.matrix, nlist, seed=args.seed)
+        engine = VectorEngine(np.asarray(engine.matrix)[order], engine.rowids[order], normalized=True)
+        engine.ivf = ivf
+
+    queries = make_queries(engine, min(args.queries, len(engine)), args.noise, args.seed)
+    print(f"[{source}] 문서 {len(engine)}개, 차원 {engine.dim}, nlist {engine.ivf.nlist}, "
+          f"질의 {len(queries)}개, top-{args.k}")
+
+    exact, exact_ms = timed(engine, queries, args.k, exact=True)
+    print(f"{'nprobe':>8} {'recall@k':>9} {'p50 ms':>8} {'p95 ms':>8} {'속도':>7}")
+    print(f"{'exact':>8} {1.0:9.4f} {np.percentile(exact_ms, 50):8.3f} {np.percentile(exact_ms, 95):8.3f} {1.0:6.1f}x")
+
+    for nprobe in args.nprobe:
+        engine.nprobe = nprobe
+        approx, ms = timed(engine, queries, args.k, exact=False)
+        recall = np.mean([len(set(a) & set(e)) / len(e) for a, e in zip(approx, exact) if e])
+        speedup = np.median(exact_ms) / max(np.median(ms), 1e-9)
+        print(f"{nprobe:>8} {recall:9.4f} {np.percentile(ms, 50):8.3f} {np.percentile(ms, 95):8.3f} {speedup:6.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
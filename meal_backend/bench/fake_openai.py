@@ -0,0 +1,222 @@
+# ── bench/fake_openai.py ──────────────────────────────────────
+# 오프라인 벤치마크용 가짜 OpenAI 서버 (표준 라이브러리 HTTP 서버, 네트워크·API 키 불필요)
+#
+#   python bench/fake_openai.py --port 8900 --embed-latency-ms 80 --chat-latency-ms 900
+#   OPENAI_BASE_URL=http://127.0.0.1:8900/v1 OPENAI_API_KEY=sk-bench uvicorn backend_main:app
+#
+# • POST /v1/embeddings:        문자 n-gram 해싱 임베딩 (결정적 - 같은 텍스트 → 같은 벡터, 표기 유사도 반영)
+#                               encoding_format=base64 (openai SDK 기본) / float 모두 지원
+# • POST /v1/chat/completions:  영양 추정 프롬프트("Food: …" / "Foods: [...]")에 식품명 해시로 만든 고정 영양값 JSON
+# • 지연: 요청마다 고정 지연 + 지터 (실제 API 의 왕복 시간 흉내), --error-rate 로 일부 요청 500
+import argparse
+import base64
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from embeddings import HashingEmbedder      # noqa: E402
+
+FAKE_DIM = 1536         # text-embedding-ada-002 와 같은 차원
+
+
+def fake_macros(name: str) -> Dict[str, float]:
+    """식품명 → 100 g 기준 고정 영양값 (해시 기반, valid_macros 검증을 통과하는 범위)"""
+    h = hashlib.blake2b(name.strip().encode("utf-8"), digest_size=8).digest()
+    carb = round(h[0] / 255 * 60, 1)
+    prot = round(h[1] / 255 * 30, 1)
+    fat = round(h[2] / 255 * 20, 1)
+    kcal = round(carb * 4 + prot * 4 + fat * 9 + h[3] / 255 * 10, 1)
+    return {"kcal": kcal, "carb": carb, "prot": prot, "fat": fat}
+
+
+class FakeOpenAI:
+    """응답 생성 + 지연 / 오류 주입 설정 (핸들러 스레드들이 공유)"""
+
+    def __init__(self, dim: int = FAKE_DIM, embed_latency: float = 0.0, chat_latency: float = 0.0,
+                 jitter: float = 0.0, error_rate: float = 0.0, seed: int = 0):
+        self.embedder = HashingEmbedder(dim=dim)
+        self.embed_latency = embed_latency
+        self.chat_latency = chat_latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.counts = {"embeddings": 0, "chat": 0, "errors": 0, "embedded_texts": 0}
+
+    def delay(self, base: float) -> bool:
+        """지연 후 오류 주입 여부 반환"""
+        with self._lock:
+            extra = self._rng.uniform(-self.jitter, self.jitter) if self.jitter else 0.0
+            fail = self._rng.random() < self.error_rate
+        time.sleep(max(0.0, base + extra))
+        return fail
+
+    def embeddings(self, body: Dict) -> Dict:
+        texts = body.get("input", [])
+        if isinstance(texts, str):
+            texts = [texts]
+        vectors = np.asarray(self.embedder.get_text_embedding_batch(texts), dtype=np.float32)
+        as_base64 = body.get("encoding_format") == "base64"
+        data = [
+            {
+                "object": "embedding",
+                "index": i,
+                "embedding": base64.b64encode(vec.tobytes()).decode("ascii") if as_base64 else vec.tolist(),
+            }
+            for i, vec in enumerate(vectors)
+        ]
+        tokens = sum(len(t) for t in texts)
+        with self._lock:
+            self.counts["embeddings"] += 1
+            self.counts["embedded_texts"] += len(texts)
+        return {
+            "object": "list",
+            "data": data,
+            "model": body.get("model", "text-embedding-ada-002"),
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        }
+
+    def chat(self, body: Dict) -> Dict:
+        prompt = next((m.get("content", "") for m in reversed(body.get("messages", [])) if m.get("role") == "user"), "")
+        content = json.dumps(self.answer(prompt), ensure_ascii=False)
+        prompt_tokens = sum(len(str(m.get("content", ""))) for m in body.get("messages", [])) // 2
+        completion_tokens = len(content) // 2
+        with self._lock:
+            self.counts["chat"] += 1
+        return {
+            "id": f"chatcmpl-fake-{self.counts['chat']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "gpt-4-turbo-preview"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    @staticmethod
+    def answer(prompt: str) -> Dict:
+        """backend_main.nutrition_batch_request / nutrition_request 프롬프트 형식에 맞춘 응답"""
+        batch = re.search(r"Foods:\s*(\[.*\])", prompt, re.S)
+        if batch:
+            try:
+                terms: List[str] = json.loads(batch.group(1))
+            except json.JSONDecodeError:
+                terms = []
+            return {t: fake_macros(t) for t in terms}
+        single = re.search(r"Food:\s*(.+?)\s*(?:\nJSON:|$)", prompt, re.S)
+        return fake_macros(single.group(1) if single else prompt)
+
+
+def make_handler(fake: FakeOpenAI):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"       # keep-alive (SDK 의 연결 재사용)
+        disable_nagle_algorithm = True      # 헤더/본문 분할 전송 시 지연 ACK 로 ~40 ms 씩 늘어나는 것 방지
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                body = json.loads(self.rfile.read(length) or b"{}")
+            except json.JSONDecodeError:
+                return self.reply(400, {"error": {"message": "invalid JSON", "type": "invalid_request_error"}})
+
+            path = self.path.split("?", 1)[0].rstrip("/")
+            if path.endswith("/embeddings"):
+                fail = fake.delay(fake.embed_latency)
+                handler = fake.embeddings
+            elif path.endswith("/chat/completions"):
+                fail = fake.delay(fake.chat_latency)
+                handler = fake.chat
+            else:
+                return self.reply(404, {"error": {"message": f"unknown path {self.path}", "type": "not_found"}})
+
+            if fail:
+                with fake._lock:
+                    fake.counts["errors"] += 1
+                return self.reply(500, {"error": {"message": "injected failure", "type": "server_error"}})
+            self.reply(200, handler(body))
+
+        def do_GET(self):
+            if self.path.rstrip("/") in ("", "/health"):
+                return self.reply(200, {"ok": True, **fake.counts})
+            self.reply(404, {"error": {"message": f"unknown path {self.path}", "type": "not_found"}})
+
+        def reply(self, status: int, payload: Dict):
+            data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass        # 요청마다 stderr 출력하지 않음
+
+    return Handler
+
+
+def start_server(host: str = "127.0.0.1", port: int = 0, **options) -> ThreadingHTTPServer:
+    """백그라운드 스레드로 서버 시작 (port=0 이면 빈 포트). base URL 은 base_url(server)"""
+    fake = FakeOpenAI(**options)
+    server = ThreadingHTTPServer((host, port), make_handler(fake))
+    server.daemon_threads = True
+    server.fake = fake
+    threading.Thread(target=server.serve_forever, name="fake-openai", daemon=True).start()
+    return server
+
+
+def base_url(server: ThreadingHTTPServer) -> str:
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}/v1"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="오프라인 벤치마크용 가짜 OpenAI 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--dim", type=int, default=FAKE_DIM, help="임베딩 차원 (픽스처 스냅샷과 같아야 함)")
+    parser.add_argument("--embed-latency-ms", type=float, default=0.0)
+    parser.add_argument("--chat-latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="지연에 더할 ± 균등 지터")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="500 으로 응답할 요청 비율 (0~1)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server = start_server(
+        args.host, args.port,
+        dim=args.dim,
+        embed_latency=args.embed_latency_ms / 1000,
+        chat_latency=args.chat_latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    print(f"🚀 가짜 OpenAI 서버: {base_url(server)} (dim={args.dim}, "
+          f"embed {args.embed_latency_ms:.0f} ms, chat {args.chat_latency_ms:.0f} ms)", flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+# ── bench/fixture.py ──────────────────────────────────────────
+# 벤치마크용 작은 픽스처 환경: 합성 foods.db + 벡터 스냅샷 + 질의 재료 목록
+#
+#   python bench/fixture.py --out /tmp/meal_bench                 # 3000행, 가짜 OpenAI 임베딩 (1536차원)
+#   python bench/fixture.py --out /tmp/meal_bench --rows 20000 --nlist -1
+#   python bench/fixture.py --out /tmp/meal_bench --backend hashing
+#
+# 결과 디렉터리 (서버는 이 디렉터리를 작업 디렉터리로 실행 - foods.db / storage/ 상대 경로):
+#   foods.db       ingest_data.write_db 로 작성 (실제 적재와 같은 스키마 / FTS / meta)
+#   storage/       build_index.build 로 작성한 엔진 스냅샷 (CURRENT)
+#   terms.json     {"known": DB 에 있는 재료, "unknown": DB 에 없는 재료 (GPT 경로)}
+#
+# openai 백엔드는 프로세스 안에서 가짜 OpenAI 서버(bench/fake_openai.py)를 띄워 임베딩한다 → 네트워크 불필요.
+# 서빙 시에도 같은 차원(--dim)의 가짜 서버를 OPENAI_BASE_URL 로 지정해야 질의 벡터가 스냅샷과 맞는다.
+import argparse
+import json
+import os
+import pathlib
+import random
+import sys
+from typing import Dict, Iterator, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from build_index import build                                     # noqa: E402
+from embeddings import Embedder, HashingEmbedder, OpenAIEmbedder  # noqa: E402
+from food_db import food_id                                       # noqa: E402
+from ingest_data import FoodRecord, write_db                      # noqa: E402
+
+import fake_openai                                                # noqa: E402
+
+FIXTURE_ROWS = 3000
+TERMS_FILE = "terms.json"
+
+# 식품군 → (기본 식품, 100 g 기준 kcal / 탄수 / 단백 / 지방 대략값)
+BASE_FOODS = {
+    "곡류 및 그 제품": [
+        ("현미밥", 150, 33, 3, 1), ("백미밥", 143, 31, 3, 0.3), ("귀리", 380, 66, 13, 7),
+        ("고구마", 130, 31, 1.4, 0.2), ("감자", 66, 15, 2, 0.1), ("식빵", 270, 50, 9, 4),
+        ("국수", 280, 58, 9, 1), ("떡", 230, 50, 4, 0.5),
+    ],
+    "육류 및 그 제품": [
+        ("닭가슴살", 109, 0, 23, 1.2), ("닭다리살", 170, 0, 18, 10), ("소고기 안심", 180, 0, 21, 10),
+        ("소고기 우둔", 130, 0, 22, 4), ("돼지고기 목살", 250, 0, 17, 20), ("돼지고기 안심", 120, 0, 22, 3),
+        ("오리고기", 300, 0, 16, 26), ("베이컨", 400, 1, 13, 38),
+    ],
+    "어패류 및 그 제품": [
+        ("연어", 200, 0, 20, 13), ("고등어", 180, 0, 20, 11), ("참치", 130, 0, 28, 1),
+        ("새우", 90, 0, 19, 1), ("오징어", 80, 2, 16, 1), ("멸치", 300, 0, 50, 6),
+    ],
+    "난류": [("계란", 140, 1, 12, 9.5), ("메추리알", 160, 0.5, 13, 11), ("계란 흰자", 50, 1, 11, 0.2)],
+    "두류 및 그 제품": [("두부", 80, 2, 9, 5), ("순두부", 50, 2, 5, 3), ("콩", 400, 30, 36, 18), ("두유", 60, 5, 4, 2)],
+    "채소류": [
+        ("브로콜리", 30, 5, 3, 0.3), ("시금치", 25, 4, 3, 0.4), ("양배추", 25, 6, 1.3, 0.1),
+        ("당근", 35, 8, 1, 0.2), ("양파", 35, 8, 1, 0.1), ("애호박", 20, 4, 1.2, 0.2),
+    ],
+    "과실류": [("바나나", 90, 23, 1.1, 0.3), ("사과", 55, 14, 0.3, 0.2), ("블루베리", 57, 14, 0.7, 0.3)],
+    "우유 및 유제품류": [("우유", 65, 5, 3.2, 3.5), ("그릭요거트", 100, 4, 9, 5), ("치즈", 350, 2, 23, 28)],
+    "견과류 및 종실류": [("아몬드", 580, 20, 21, 50), ("호두", 650, 14, 15, 65), ("땅콩버터", 590, 20, 25, 50)],
+}
+PREPS = ["", "생것", "삶은것", "구운것", "찐것", "볶은것", "튀긴것", "조림", "냉동", "통조림", "건조", "훈제"]
+ORIGINS = ["", "국내산", "수입산", "유기농", "저염", "저지방"]
+
+# DB 에 없는 재료 (RAG / 키워드 검색 실패 → GPT 추정 경로)
+UNKNOWN_TERMS = ["퀴노아", "아보카도", "렌틸콩", "병아리콩", "케일", "치아씨드", "템페", "귀리우유", "코티지치즈", "훈제 칠면조"]
+
+
+def synthetic_records(count: int, seed: int = 0) -> Iterator[FoodRecord]:
+    """기본 식품 × 조리법 × 원산지 조합으로 식품명을 만들고 영양값에 ±15% 잡음 (결정적)"""
+    rng = random.Random(seed)
+    combos = [
+        (group, base, prep, origin)
+        for group, foods in BASE_FOODS.items()
+        for base in foods
+        for prep in PREPS
+        for origin in ORIGINS
+    ]
+    seen: Dict[tuple, int] = {}
+    for n in range(count):
+        group, (name, kcal, carb, prot, fat), prep, origin = combos[n % len(combos)]
+        parts = [name] + [p for p in (prep, origin) if p]
+        if n >= len(combos):
+            parts.append(f"{n // len(combos) + 1}번")      # 조합이 모자라면 변형 번호
+        full_name = ", ".join(parts)
+        occurrence = seen.get((full_name, group), 0)
+        seen[(full_name, group)] = occurrence + 1
+        jitter = [rng.uniform(0.85, 1.15) for _ in range(4)]
+        yield (
+            food_id(full_name, group, occurrence),
+            n + 1,
+            full_name,
+            group,
+            *(round(v * j, 1) for v, j in zip((kcal, carb, prot, fat), jitter)),
+        )
+
+
+def query_terms() -> Dict[str, List[str]]:
+    known = sorted({base for foods in BASE_FOODS.values() for base, *_ in foods})
+    return {"known": known, "unknown": list(UNKNOWN_TERMS)}
+
+
+def make_fixture(
+    out_dir: str,
+    rows: int = FIXTURE_ROWS,
+    backend: str = "openai",
+    dim: int = fake_openai.FAKE_DIM,
+    nlist: int = 0,
+    seed: int = 0,
+    embedder: Optional[Embedder] = None,
+) -> str:
+    """픽스처 디렉터리 작성 후 엔진 스냅샷 경로 반환"""
+    out = pathlib.Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    db_path = out / "foods.db"
+    written = write_db(synthetic_records(rows, seed), db_path, source="bench-fixture")
+    print(f"✅ {db_path} 작성 완료, 행 수: {written}")
+
+    server = None
+    if embedder is None:
+        if backend == "openai":
+            from openai import OpenAI
+            server = fake_openai.start_server(dim=dim)
+            client = OpenAI(base_url=fake_openai.base_url(server), api_key="sk-bench", max_retries=0)
+            embedder = OpenAIEmbedder(client=client)
+        elif backend == "hashing":
+            embedder = HashingEmbedder(dim=dim)
+        else:
+            raise SystemExit(f"픽스처가 지원하지 않는 임베딩 백엔드: {backend} (openai | hashing)")
+    try:
+        # 픽스처는 매번 처음부터 (이전 픽스처의 임베딩 재사용 없음)
+        engine_dir = build(str(db_path), str(out / "storage"), full=True, embedder=embedder, nlist=nlist)
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    with open(out / TERMS_FILE, "w", encoding="utf-8") as f:
+        json.dump(query_terms(), f, ensure_ascii=False, indent=2)
+    return engine_dir
+
+
+def load_terms(fixture_dir: str) -> Dict[str, List[str]]:
+    path = os.path.join(fixture_dir, TERMS_FILE)
+    if not os.path.exists(path):
+        return query_terms()
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="벤치마크 픽스처 (합성 foods.db + 스냅샷) 생성")
+    parser.add_argument("--out", default="bench_fixture")
+    parser.add_argument("--rows", type=int, default=FIXTURE_ROWS)
+    parser.add_argument("--backend", default="openai", choices=["openai", "hashing"],
+                        help="openai = 프로세스 내 가짜 OpenAI 서버로 임베딩")
+    parser.add_argument("--dim", type=int, default=fake_openai.FAKE_DIM)
+    parser.add_argument("--nlist", type=int, default=0, help="IVF 클러스터 수 (0: 없음, -1: 자동)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    make_fixture(args.out, args.rows, args.backend, args.dim, args.nlist, args.seed)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+# ── bench/import_time.py ──────────────────────────────────────
+# 서빙 워커 import 시간 측정 + 무거운 빌드 전용 모듈 유입 감시
+#
+#   python bench/import_time.py                      # backend_main import 시간, 상위 모듈
+#   python bench/import_time.py --max-seconds 1.5    # 기준 초과 시 종료 코드 1
+#   python bench/import_time.py --module rag_index   # 다른 모듈 측정
+#
+# llama_index / pandas 가 서빙 프로세스에 import 되면 실패로 처리한다.
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FORBIDDEN   = ("llama_index", "pandas")
+
+# 자식 프로세스: 모듈 import 후 로드된 모듈 목록을 JSON 으로 출력
+_CHILD = """
+import json, sys, time
+t0 = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - t0
+print("__RESULT__" + json.dumps({{"elapsed": elapsed, "modules": sorted(sys.modules)}}))
+"""
+
+
+def run_once(module: str, env: Dict[str, str]) -> Tuple[float, float, List[str], str]:
+    """(프로세스 전체 시간, import 시간, 로드된 모듈, -X importtime stderr)"""
+    t0 = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _CHILD.format(module=module)],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - t0
+    lines = [l for l in proc.stdout.splitlines() if l.startswith("__RESULT__")]
+    if proc.returncode != 0 or not lines:
+        sys.stderr.write(proc.stderr[-4000:])
+        raise SystemExit(f"{module} import 실패 (exit {proc.returncode})")
+    result = json.loads(lines[-1][len("__RESULT__"):])
+    return wall, result["elapsed"], result["modules"], proc.stderr
+
+
+def top_imports(importtime_log: str, n: int) -> List[Tuple[int, str]]:
+    """-X importtime 출력에서 측정 모듈이 직접 import 한 모듈의 누적 시간(us) 상위 n개"""
+    totals: Dict[str, int] = {}
+    for line in importtime_log.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # 들여쓰기 2칸 = 측정 모듈의 직접 import (누적 시간이 하위 import 를 포함)
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            name = name.strip()
+            totals[name] = totals.get(name, 0) + int(cumulative)
+    return sorted(((us, name) for name, us in totals.items()), reverse=True)[:n]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="서빙 모듈 import 시간 측정")
+    parser.add_argument("--module", default="backend_main")
+    parser.add_argument("--repeat", type=int, default=3, help="반복 횟수 (중앙값 보고)")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--max-seconds", type=float, default=0.0, help="import 시간 상한 (0 이면 검사 안 함)")
+    parser.add_argument("--allow", action="append", default=[], help="허용할 금지 모듈 접두사")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault("FAST_BOOT", "1")
+    env.setdefault("OPENAI_API_KEY", "sk-bench")
+
+    runs = [run_once(args.module, env) for _ in range(args.repeat)]
+    runs.sort(key=lambda r: r[1])
+    wall, elapsed, modules, log = runs[len(runs) // 2]
+
+    print(f"[{args.module}] import {elapsed:.3f}s (프로세스 {wall:.3f}s, 중앙값 / {args.repeat}회)")
+    print(f"로드된 모듈 수: {len(modules)}")
+    print("누적 import 시간 상위:")
+    for us, name in top_imports(log, args.top):
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+    failed = False
+    forbidden = [p for p in FORBIDDEN if p not in args.allow]
+    leaked = sorted({m.split(".")[0] for m in modules if m.split(".")[0] in forbidden})
+    if leaked:
+        print(f"✗ 서빙 경로에 빌드 전용 모듈 import: {', '.join(leaked)}")
+        failed = True
+    if args.max_seconds > 0 and elapsed > args.max_seconds:
+        print(f"✗ import 시간 {elapsed:.3f}s > 상한 {args.max_seconds:.3f}s")
+        failed = True
+    if not failed:
+        print("✓ 통과")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+# ── bench/loadgen.py ──────────────────────────────────────────
+# /recommend HTTP 부하 생성기 - 처리량, 지연 p50/p95/p99, 상태 코드 분포
+#
+#   # 1) 픽스처 + 가짜 OpenAI + uvicorn 을 직접 띄워 측정 (네트워크 없음)
+#   python bench/loadgen.py --spawn --concurrency 16 --duration 20 --chat-latency-ms 800
+#
+#   # 2) 이미 떠 있는 서버 측정
+#   python bench/loadgen.py --url http://127.0.0.1:8000 --requests 2000 --concurrency 32
+#
+# 요청 구성:
+#   --unique-ratio   매번 다른 체중으로 보내 응답 캐시를 비켜가는 요청 비율 (나머지는 작은 요청 풀에서 반복)
+#   --unknown-ratio  DB 에 없는 재료(GPT 추정 경로)를 섞는 요청 비율
+#   --etag           같은 요청의 이전 ETag 를 If-None-Match 로 보냄 (304 경로)
+#
+# 의존성: httpx (requirements.txt - openai SDK 도 사용), --spawn 은 uvicorn 필요
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BACKEND_DIR)
+
+from fixture import load_terms, make_fixture        # noqa: E402
+
+GOALS = ("bulk", "diet", "maintain")
+
+
+class RequestMix:
+    """결정적 요청 생성 (시드 고정) - 반복 요청 풀 + 고유 요청"""
+
+    def __init__(self, terms: Dict[str, List[str]], unique_ratio: float, unknown_ratio: float,
+                 pool_size: int, seed: int):
+        self.known = terms["known"]
+        self.unknown = terms["unknown"]
+        self.unique_ratio = unique_ratio
+        self.unknown_ratio = unknown_ratio
+        self.rng = random.Random(seed)
+        self.pool = [self._payload(i) for i in range(pool_size)]
+        self.etags: Dict[int, str] = {}
+
+    def _payload(self, key: int) -> Dict:
+        ingredients = self.rng.sample(self.known, self.rng.randint(2, 6))
+        if self.rng.random() < self.unknown_ratio:
+            ingredients.append(self.rng.choice(self.unknown))
+        return {
+            "ingredients": ingredients,
+            "weight": round(self.rng.uniform(45, 100), 1),
+            "goal": self.rng.choice(GOALS),
+            "meals": self.rng.randint(1, 5),
+        }
+
+    def next(self, n: int) -> Tuple[Optional[int], Dict]:
+        """(풀 번호 또는 None, 요청 본문)"""
+        if self.rng.random() < self.unique_ratio:
+            payload = self._payload(-1)
+            payload["weight"] = 30 + n * 0.001          # 요청마다 다른 캐시 키
+            return None, payload
+        key = self.rng.randrange(len(self.pool))
+        return key, self.pool[key]
+
+
+async def run_load(url: str, mix: RequestMix, concurrency: int, total: int, duration: float,
+                   use_etag: bool, timeout: float) -> Tuple[np.ndarray, Counter, float]:
+    """동시 워커 concurrency 개가 total 개(또는 duration 초 동안) 요청 → (지연 s 배열, 상태 코드, 경과 s)"""
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    counter = iter(range(total if total > 0 else 1 << 62))
+    deadline = time.perf_counter() + duration if duration > 0 else float("inf")
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits) as client:
+        async def worker():
+            for n in counter:
+                if time.perf_counter() >= deadline:
+                    return
+                key, payload = mix.next(n)
+                headers = {}
+                if use_etag and key is not None and key in mix.etags:
+                    headers["If-None-Match"] = mix.etags[key]
+                t0 = time.perf_counter()
+                try:
+                    resp = await client.post("/recommend", json=payload, headers=headers)
+                    status = str(resp.status_code)
+                    if key is not None and "etag" in resp.headers:
+                        mix.etags[key] = resp.headers["etag"]
+                except httpx.HTTPError as e:
+                    status = type(e).__name__
+                latencies.append(time.perf_counter() - t0)
+                statuses[status] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return np.array(latencies), statuses, elapsed
+
+
+def report(latencies: np.ndarray, statuses: Counter, elapsed: float) -> None:
+    if not len(latencies):
+        print("❌ 완료된 요청이 없습니다")
+        return
+    ms = latencies * 1000
+    print(f"요청 {len(ms)}개 / {elapsed:.1f}s → 처리량 {len(ms) / elapsed:.1f} req/s")
+    print(f"지연 ms: 평균 {ms.mean():.1f}, p50 {np.percentile(ms, 50):.1f}, p95 {np.percentile(ms, 95):.1f}, "
+          f"p99 {np.percentile(ms, 99):.1f}, 최대 {ms.max():.1f}")
+    print("상태: " + ", ".join(f"{k}={v}" for k, v in sorted(statuses.items())))
+
+
+# ─── 서버 기동 (--spawn) ───────────────────────────────────────────────────
+def wait_ready(url: str, proc: subprocess.Popen, timeout: float = 60) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f"서버 프로세스가 종료되었습니다 (코드 {proc.returncode})")
+        try:
+            if httpx.get(url, timeout=1).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise SystemExit(f"{url} 가 {timeout:.0f}s 안에 응답하지 않습니다")
+
+
+def spawn_servers(args) -> List[subprocess.Popen]:
+    """가짜 OpenAI 서버 + uvicorn(backend_main) 을 픽스처 디렉터리에서 기동"""
+    fixture_dir = os.path.abspath(args.fixture)
+    if not os.path.exists(os.path.join(fixture_dir, "foods.db")):
+        make_fixture(fixture_dir, rows=args.rows)
+
+    fake_cmd = [
+        sys.executable, os.path.join(BENCH_DIR, "fake_openai.py"), "--port", str(args.fake_port),
+        "--embed-latency-ms", str(args.embed_latency_ms), "--chat-latency-ms", str(args.chat_latency_ms),
+        "--jitter-ms", str(args.jitter_ms),
+    ]
+    fake = subprocess.Popen(fake_cmd)
+    procs = [fake]
+    wait_ready(f"http://127.0.0.1:{args.fake_port}/health", fake)
+
+    env = dict(
+        os.environ,
+        OPENAI_BASE_URL=f"http://127.0.0.1:{args.fake_port}/v1",
+        OPENAI_API_KEY=os.environ.get("OPENAI_API_KEY", "sk-bench"),
+        PYTHONPATH=os.pathsep.join(p for p in (BACKEND_DIR, os.environ.get("PYTHONPATH")) if p),
+    )
+    port = httpx.URL(args.url).port or 8000
+    server_cmd = [
+        sys.executable, "-m", "uvicorn", "backend_main:app", "--port", str(port),
+        "--workers", str(args.workers), "--log-level", "warning",
+    ]
+    server = subprocess.Popen(server_cmd, cwd=fixture_dir, env=env,
+                              stdout=None if args.server_logs else subprocess.DEVNULL,
+                              stderr=None if args.server_logs else subprocess.DEVNULL)
+    procs.append(server)
+    wait_ready(args.url.rstrip("/") + "/health", server)
+    return procs
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="/recommend 부하 생성기")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=1000, help="총 요청 수 (--duration 지정 시 무시)")
+    parser.add_argument("--duration", type=float, default=0, help="측정 시간 s (0 이면 --requests 만큼)")
+    parser.add_argument("--warmup", type=int, default=20, help="측정 전 요청 수")
+    parser.add_argument("--unique-ratio", type=float, default=0.2)
+    parser.add_argument("--unknown-ratio", type=float, default=0.1)
+    parser.add_argument("--pool", type=int, default=50, help="반복 요청 풀 크기")
+    parser.add_argument("--etag", action="store_true", help="If-None-Match 로 이전 ETag 전송")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--seed", type=int, default=0)
+    # --spawn 전용
+    parser.add_argument("--spawn", action="store_true", help="픽스처 + 가짜 OpenAI + uvicorn 을 직접 기동")
+    parser.add_argument("--fixture", default="bench_fixture")
+    parser.add_argument("--rows", type=int, default=3000)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn 워커 수")
+    parser.add_argument("--fake-port", type=int, default=8900)
+    parser.add_argument("--embed-latency-ms", type=float, default=80)
+    parser.add_argument("--chat-latency-ms", type=float, default=800)
+    parser.add_argument("--jitter-ms", type=float, default=20)
+    parser.add_argument("--server-logs", action="store_true", help="uvicorn 출력 표시")
+    args = parser.parse_args()
+
+    procs = spawn_servers(args) if args.spawn else []
+    try:
+        mix = RequestMix(load_terms(args.fixture), args.unique_ratio, args.unknown_ratio, args.pool, args.seed)
+        if args.warmup:
+            asyncio.run(run_load(args.url, mix, min(args.concurrency, args.warmup), args.warmup, 0,
+                                 args.etag, args.timeout))
+        print(f"🚀 {args.url}/recommend - 동시 {args.concurrency}, "
+              + (f"{args.duration:.0f}s" if args.duration > 0 else f"{args.requests}건")
+              + f", 고유 {args.unique_ratio:.0%}, GPT 재료 {args.unknown_ratio:.0%}")
+        report(*asyncio.run(run_load(args.url, mix, args.concurrency, args.requests, args.duration,
+                                     args.etag, args.timeout)))
+    finally:
+        for proc in reversed(procs):
+            proc.terminate()
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+# ── bench/micro.py ────────────────────────────────────────────
+# 검색 / 배분 함수 단위 마이크로 벤치마크 (픽스처 환경 + 프로세스 내 가짜 OpenAI 서버, 네트워크 없음)
+#
+#   python bench/micro.py                                  # bench_fixture/ (없으면 생성)
+#   python bench/micro.py --fixture /tmp/meal_bench --iters 2000
+#   python bench/micro.py --embed-latency-ms 80            # 임베딩 캐시 미적중 비용에 API 왕복 시간 포함
+#
+# 측정 항목 (호출 1회씩, 워밍업 후):
+#   db_rows_like              키워드 등급 검색 (FTS / LIKE)
+#   semantic_food_search      질의 임베딩 캐시 적중 (warm) / 미적중 (cold - 매번 새 질의)
+#   semantic_food_search_batch 재료 5개 배치
+#   plan_meals                배분 + items() + markdown() (응답 본문 생성까지)
+import argparse
+import logging
+import os
+import sys
+import time
+from typing import Callable, List
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fake_openai                                   # noqa: E402
+from fixture import load_terms, make_fixture         # noqa: E402
+
+
+def measure(name: str, fn: Callable[[int], object], iters: int, warmup: int) -> None:
+    """fn(i) 를 iters 회 호출해 호출별 지연 분포 출력"""
+    for i in range(warmup):
+        fn(i)
+    times = np.empty(iters)
+    for i in range(iters):
+        t0 = time.perf_counter()
+        fn(i)
+        times[i] = time.perf_counter() - t0
+    us = times * 1e6
+    print(f"{name:<34} {iters:>6} {us.mean():>10.1f} {np.percentile(us, 50):>10.1f} "
+          f"{np.percentile(us, 95):>10.1f} {np.percentile(us, 99):>10.1f} {iters / times.sum():>10.0f}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="검색 / 배분 마이크로 벤치마크 (오프라인)")
+    parser.add_argument("--fixture", default="bench_fixture", help="픽스처 디렉터리 (없으면 생성)")
+    parser.add_argument("--rows", type=int, default=3000, help="픽스처 생성 시 행 수")
+    parser.add_argument("--iters", type=int, default=1000)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--embed-latency-ms", type=float, default=0.0, help="가짜 임베딩 API 지연")
+    parser.add_argument("--log-level", default="WARNING", help="백엔드 로그 레벨 (INFO 면 로그 비용 포함)")
+    args = parser.parse_args()
+
+    fixture_dir = os.path.abspath(args.fixture)
+    if not os.path.exists(os.path.join(fixture_dir, "foods.db")):
+        make_fixture(fixture_dir, rows=args.rows)
+    terms = load_terms(fixture_dir)
+
+    # 백엔드는 작업 디렉터리 기준 상대 경로(foods.db, storage/, 캐시 DB)와 OPENAI_BASE_URL 을 읽음
+    server = fake_openai.start_server(embed_latency=args.embed_latency_ms / 1000)
+    os.environ["OPENAI_BASE_URL"] = fake_openai.base_url(server)
+    os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+    os.chdir(fixture_dir)
+
+    t0 = time.perf_counter()
+    import backend_main as b
+    from meal_planner import plan_meals
+    print(f"⏱️  backend_main import {time.perf_counter() - t0:.2f}s, 픽스처 {fixture_dir}")
+    logging.getLogger().setLevel(args.log_level)
+
+    t0 = time.perf_counter()
+    if not b.ensure_rag_loaded():
+        print("❌ RAG 로드 실패 - 픽스처 스냅샷을 확인하세요")
+        return 1
+    print(f"⏱️  RAG 로드 {time.perf_counter() - t0:.2f}s, 문서 {len(b.vector_engine)}개, "
+          f"임베딩 {b.embed_model.backend} ({b.embed_model.model_id})")
+
+    known: List[str] = terms["known"]
+    queries = known + [f"{a} {c}" for a, c in zip(known, known[1:])]     # 단어 1개 / 2개 질의
+    rows = [r for t in known[:20] for r in b.db_rows_like(t, 1)]
+    print()
+    print(f"{'항목':<34} {'호출':>6} {'평균 µs':>10} {'p50 µs':>10} {'p95 µs':>10} {'p99 µs':>10} {'ops/s':>10}")
+
+    measure("db_rows_like", lambda i: b.db_rows_like(queries[i % len(queries)]), args.iters, args.warmup)
+    b.semantic_food_search_batch(queries)      # warm 측정용 질의 임베딩 캐시 채움
+    measure("semantic_food_search (warm)", lambda i: b.semantic_food_search(queries[i % len(queries)]),
+            args.iters, args.warmup)
+    cold_iters = max(1, args.iters // 10) if args.embed_latency_ms else args.iters
+    measure("semantic_food_search (cold)",
+            lambda i: b.semantic_food_search(f"{queries[i % len(queries)]} {time.perf_counter_ns()}"),
+            cold_iters, min(args.warmup, cold_iters))
+    measure("semantic_food_search_batch ×5",
+            lambda i: b.semantic_food_search_batch([queries[(i + k) % len(queries)] for k in range(5)]),
+            args.iters, args.warmup)
+    for n in (5, 20):
+        picked = rows[:n]
+        measure(f"plan_meals ×{len(picked)} +items+markdown",
+                lambda i: _plan(plan_meals, picked, 2000 + i % 7 * 150, 3), args.iters, args.warmup)
+
+    server.shutdown()
+    return 0
+
+
+def _plan(plan_meals, rows, kcal, meals):
+    plan = plan_meals(rows, kcal, meals)
+    return plan.items(), plan.markdown()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
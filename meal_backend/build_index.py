@@ -0,0 +1,251 @@
+# ── build_index.py ────────────────────────────────────────────
+# 오프라인 인덱스 빌드: foods.db → storage/engine-<version>/ (.npy 엔진 스냅샷)
+#
+#   python build_index.py              # 바뀐 행만 재임베딩 (증분)
+#   python build_index.py --full       # 기존 임베딩을 쓰지 않고 전체 재임베딩
+#   python build_index.py --dry-run    # 재사용/신규/삭제 건수만 출력
+#   python build_index.py --backend hashing   # 로컬 임베딩 (네트워크 없이 빌드, 기본 EMBED_BACKEND)
+#   python build_index.py --ivf        # IVF 근사 검색 인덱스 함께 생성 (--nlist 로 클러스터 수 지정)
+#
+# • 각 행의 문서 텍스트 해시가 이전 스냅샷과 같으면 그 임베딩을 그대로 재사용
+# • 새로 추가되거나 내용이 바뀐 행만 큰 배치로 임베딩, DB 에서 사라진 행은 제외
+# • 새 버전 폴더에 기록한 뒤 storage/CURRENT 를 교체 → 서빙 중인 워커는 항상 완성된 스냅샷만 봄
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from embeddings import EMBED_BACKEND, Embedder, OpenAIEmbedder, get_embedder
+from ivf_index import IVFIndex, default_nlist
+from food_db import ensure_fts_index, read_db_meta
+from rag_index import DB_PATH, PERSIST_DIR, EMBED_MODEL, document_text
+from vector_engine import (
+    VectorEngine,
+    BUILD_SOURCE,
+    ENGINE_SUBDIR,
+    HASHES_FILE,
+    LLAMA_DOCSTORE,
+    LLAMA_VECTOR_STORE,
+    convert_llama_snapshot,
+    engine_dir_for,
+    llama_snapshot_stale,
+    next_engine_dir,
+    publish_engine_dir,
+    read_meta,
+)
+
+BUILD_BATCH   = int(os.getenv("BUILD_EMBED_BATCH", "1000"))   # 임베딩 API 1회 요청당 문장 수 (OpenAI 상한 2048)
+KEEP_VERSIONS = 2                                              # 보존할 이전 빌드 버전 수 (현재 버전 제외)
+HASH_DTYPE    = "S32"                                          # blake2b 16바이트 hex
+
+
+# ─── 1) 원본 행 / 해시 ────────────────────────────────────────────────────
+def text_hash(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest().encode("ascii")
+
+
+def read_documents(db_path: str) -> Tuple[np.ndarray, List[str], dict]:
+    """foods.db → (rowids, 문서 텍스트, DB meta) - rowid 순"""
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute(
+            "SELECT rowid, 식품명, 에너지kcal, 탄수화물g, 단백질g, 지방g FROM foods ORDER BY rowid"
+        ).fetchall()
+        db_meta = read_db_meta(conn)
+    rowids = np.array([r[0] for r in rows], dtype=np.int64)
+    texts = [document_text(*r[1:]) for r in rows]
+    return rowids, texts, db_meta
+
+
+# ─── 2) 이전 스냅샷 ───────────────────────────────────────────────────────
+def previous_embeddings(persist_dir: str, model: str) -> Tuple[Dict[bytes, np.ndarray], np.ndarray]:
+    """
+    이전 엔진 스냅샷의 ({텍스트 해시: 임베딩}, rowids)
+    • 빌드 스냅샷이면 hashes.npy 사용
+    • llama-index 에서 변환한 스냅샷이면 docstore.json 의 문서 텍스트로 해시 계산 (최초 1회 이전용)
+    • 임베딩 모델이 다르면 재사용하지 않음
+    """
+    engine_dir = engine_dir_for(persist_dir)
+    meta = read_meta(engine_dir)
+    if not meta:
+        return {}, np.empty(0, dtype=np.int64)
+    # embed_model 기록이 없는 스냅샷은 llama-index(OpenAI)에서 변환한 것
+    if meta.get("embed_model", EMBED_MODEL) != model:
+        print(f"ℹ️  임베딩 모델 변경 ({meta.get('embed_model')} → {model}) - 전체 재임베딩")
+        return {}, np.empty(0, dtype=np.int64)
+
+    engine = VectorEngine.load(engine_dir, mmap=False)
+    hashes_path = os.path.join(engine_dir, HASHES_FILE)
+    if os.path.exists(hashes_path):
+        hashes = list(np.load(hashes_path))
+    else:
+        hashes = _docstore_hashes(persist_dir, engine.rowids)
+    if hashes is None:
+        return {}, engine.rowids
+
+    # 엔진 행렬은 정규화된 상태 - 검색은 코사인이므로 그대로 재사용해도 결과 동일
+    matrix = np.asarray(engine.matrix, dtype=np.float32)
+    return {h: matrix[i] for i, h in enumerate(hashes) if h}, engine.rowids
+
+
+def _docstore_hashes(persist_dir: str, rowids: np.ndarray) -> Optional[List[bytes]]:
+    path = os.path.join(persist_dir, LLAMA_DOCSTORE)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        docs = json.load(f).get("docstore/data", {})
+    text_by_rowid = {}
+    for doc in docs.values():
+        data = doc.get("__data__", {})
+        rowid = data.get("metadata", {}).get("rowid")
+        if rowid is not None and "text" in data:
+            text_by_rowid[int(rowid)] = data["text"]
+    return [
+        text_hash(text_by_rowid[r]) if r in text_by_rowid else b""
+        for r in rowids.tolist()
+    ]
+
+
+# ─── 3) 빌드 ──────────────────────────────────────────────────────────────
+def embed_texts(embedder: Embedder, texts: List[str], batch_size: int) -> np.ndarray:
+    if isinstance(embedder, OpenAIEmbedder):
+        embedder.batch_size = batch_size        # 빌드는 API 요청당 문장 수를 크게
+    vectors = []
+    for start in range(0, len(texts), batch_size):
+        chunk = texts[start:start + batch_size]
+        vectors.extend(embedder.get_text_embedding_batch(chunk))
+        print(f"   … {min(start + batch_size, len(texts))}/{len(texts)} 임베딩 완료")
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def build(
+    db_path: str = DB_PATH,
+    persist_dir: str = PERSIST_DIR,
+    dtype: str = "float32",
+    batch_size: int = BUILD_BATCH,
+    full: bool = False,
+    dry_run: bool = False,
+    embedder: Optional[Embedder] = None,
+    nlist: int = 0,
+) -> Optional[str]:
+    """
+    증분 빌드 후 새 버전 폴더 경로 반환 (dry_run 이면 None)
+    embedder: 기본은 EMBED_BACKEND
+    nlist:    IVF 클러스터 수 (0 이면 IVF 없음, 음수면 문서 수에 따라 자동)
+    """
+    t0 = time.time()
+    embedder = embedder or get_embedder()
+    rowids, texts, db_meta = read_documents(db_path)
+    hashes = [text_hash(t) for t in texts]
+    if not full and not dry_run and llama_snapshot_stale(persist_dir) \
+            and os.path.exists(os.path.join(persist_dir, LLAMA_VECTOR_STORE)):
+        # llama-index 스냅샷만 있으면 먼저 엔진으로 변환 (서빙은 변환하지 않음, 기존 임베딩 재사용 가능)
+        print(f"🔄 llama-index 스냅샷 변환 → '{convert_llama_snapshot(persist_dir, dtype)}'")
+    if full:
+        previous, prev_rowids = {}, np.empty(0, dtype=np.int64)
+    else:
+        previous, prev_rowids = previous_embeddings(persist_dir, embedder.model_id)
+
+    todo = [i for i, h in enumerate(hashes) if h not in previous]
+    reused = len(hashes) - len(todo)
+    removed = int(np.count_nonzero(~np.isin(prev_rowids, rowids)))
+    print(f"🔤 임베딩: {embedder.backend} ({embedder.model_id})")
+    print(f"📋 문서 {len(texts)}개: 재사용 {reused}, 신규/변경 {len(todo)}, 삭제 {removed}")
+    if dry_run:
+        return None
+    if not texts:
+        raise SystemExit(f"'{db_path}' 에 foods 행이 없습니다")
+
+    fresh = embed_texts(embedder, [texts[i] for i in todo], batch_size) if todo else np.empty((0, 0), np.float32)
+    dim = fresh.shape[1] if todo else len(next(iter(previous.values())))
+    matrix = np.empty((len(texts), dim), dtype=np.float32)
+    for j, i in enumerate(todo):
+        matrix[i] = fresh[j]
+    for i, h in enumerate(hashes):
+        if h in previous:
+            matrix[i] = previous[h]
+
+    version, engine_dir = next_engine_dir(persist_dir)
+    os.makedirs(persist_dir, exist_ok=True)
+
+    engine = VectorEngine(matrix, rowids)
+    hashes = np.array(hashes, dtype=HASH_DTYPE)
+    extra_arrays = {HASHES_FILE: hashes}
+    ann_meta = {}
+    if nlist < 0:
+        nlist = default_nlist(len(texts))
+    if nlist > 0:
+        # IVF: 행을 클러스터 순으로 재배열 (hashes 도 같은 순서 - 다음 증분 빌드가 그대로 사용)
+        ivf, order = IVFIndex.train(engine.matrix, nlist)
+        engine = VectorEngine(engine.matrix[order], engine.rowids[order], normalized=True)
+        extra_arrays = {HASHES_FILE: hashes[order], **ivf.arrays()}
+        ann_meta = {"ann": "ivf", "ivf_nlist": ivf.nlist}
+        print(f"🧭 IVF 인덱스: 클러스터 {ivf.nlist}개")
+
+    engine.save(
+        engine_dir,
+        dtype=dtype,
+        extra_meta={
+            **ann_meta,
+            "source": BUILD_SOURCE,
+            "version": version,
+            "embed_backend": embedder.backend,
+            "embed_model": embedder.model_id,
+            "db_path": os.path.abspath(db_path),
+            # 서빙 시 foods.db meta 와 비교 (id 체계가 다르면 rowid 로 연결할 수 없음)
+            "db_version": db_meta.get("db_version"),
+            "id_scheme": db_meta.get("id_scheme"),
+            "reused": reused,
+            "embedded": len(todo),
+            "removed": removed,
+        },
+        extra_arrays=extra_arrays,
+    )
+    publish_engine_dir(persist_dir, engine_dir)
+    prune_versions(persist_dir, engine_dir)
+    print(f"✅  엔진 스냅샷 v{version} → '{engine_dir}' ({len(texts)} docs, {time.time() - t0:.1f}s)")
+    return engine_dir
+
+
+def prune_versions(persist_dir: str, current_dir: str, keep: int = KEEP_VERSIONS) -> None:
+    """현재 버전을 제외한 오래된 빌드 폴더 정리 (직전 keep 개는 롤백용으로 보존)"""
+    prefix = ENGINE_SUBDIR + "-"
+    current = os.path.basename(current_dir.rstrip(os.sep))
+    versions = sorted(
+        name for name in os.listdir(persist_dir)
+        if name.startswith(prefix) and name[len(prefix):].isdigit() and name != current
+    )
+    for name in versions[:max(len(versions) - keep, 0)]:
+        shutil.rmtree(os.path.join(persist_dir, name), ignore_errors=True)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="foods.db → 벡터 엔진 스냅샷 (증분 빌드)")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--persist-dir", default=PERSIST_DIR)
+    parser.add_argument("--dtype", default=os.getenv("VECTOR_DTYPE", "float32"), choices=["float32", "float16"])
+    parser.add_argument("--batch", type=int, default=BUILD_BATCH)
+    parser.add_argument("--backend", default=EMBED_BACKEND, help="openai | hashing | sentence-transformers")
+    parser.add_argument("--model", default=None, help="임베딩 모델명 (openai / sentence-transformers)")
+    parser.add_argument("--full", action="store_true", help="기존 임베딩을 재사용하지 않음")
+    parser.add_argument("--dry-run", action="store_true", help="건수만 출력하고 임베딩/저장하지 않음")
+    parser.add_argument("--ivf", action="store_true", help="IVF 근사 검색 인덱스 생성")
+    parser.add_argument("--nlist", type=int, default=0, help="IVF 클러스터 수 (기본 ≈ 4·√문서 수)")
+    args = parser.parse_args()
+
+    embedder = get_embedder(args.backend, args.model)
+    nlist = args.nlist if args.nlist > 0 else (-1 if args.ivf else 0)
+    if not args.dry_run:
+        ensure_fts_index(args.db)       # 이전 버전 ingest 로 만든 DB 면 키워드 검색용 FTS 도 여기서 생성
+    build(args.db, args.persist_dir, args.dtype, args.batch, args.full, args.dry_run, embedder, nlist)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
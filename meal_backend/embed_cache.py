@@ -0,0 +1,173 @@
+# ── embed_cache.py ────────────────────────────────────────────
+# 질의 임베딩 캐시: 메모리 LRU + 디스크(SQLite), (임베딩 모델, 정규화된 질의) 기준
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# ─── 1) 설정 ──────────────────────────────────────────────────────────────
+EMBED_CACHE_PATH   = os.getenv("EMBED_CACHE_PATH", "embed_cache.db")
+EMBED_CACHE_MEMORY = int(os.getenv("EMBED_CACHE_MEMORY", "4096"))     # 메모리 LRU 최대 항목 수
+EMBED_CACHE_DISK   = int(os.getenv("EMBED_CACHE_DISK", "200000"))     # 디스크 최대 항목 수
+
+
+def normalize_query(text: str) -> str:
+    """캐시 키용 정규화: NFC, 앞뒤 공백 제거, 연속 공백 1칸, 소문자"""
+    text = unicodedata.normalize("NFC", text).strip().lower()
+    return re.sub(r"\s+", " ", text)
+
+
+# ─── 2) 캐시 ──────────────────────────────────────────────────────────────
+class EmbeddingCache:
+    """
+    • get_many(): 메모리 → 디스크 순으로 조회, 디스크 적중 항목은 메모리로 승격
+    • put_many(): 메모리와 디스크에 함께 기록, 크기 제한 초과 시 오래된 항목부터 제거
+    • stats():   적중/미적중 카운터와 현재 크기
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = EMBED_CACHE_PATH,
+        max_memory: int = EMBED_CACHE_MEMORY,
+        max_disk: int = EMBED_CACHE_DISK,
+    ):
+        self.max_memory = max_memory
+        self.max_disk = max_disk
+        self._memory: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._conn = None
+        if path:
+            try:
+                self._conn = sqlite3.connect(path, check_same_thread=False)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS embeddings ("
+                    " model TEXT NOT NULL, text TEXT NOT NULL,"
+                    " dim INTEGER NOT NULL, vector BLOB NOT NULL,"
+                    " created_at REAL NOT NULL,"
+                    " PRIMARY KEY (model, text))"
+                )
+                self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_created ON embeddings(created_at)")
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logging.warning(f"임베딩 디스크 캐시 사용 불가 ({path}): {e}")
+                self._conn = None
+
+    # ── 조회 ────────────────────────────────────────────────────
+    def get_many(self, model: str, texts: Sequence[str]) -> Dict[str, np.ndarray]:
+        """정규화된 질의 목록 → 캐시에 있는 항목만 {질의: 벡터}"""
+        found: Dict[str, np.ndarray] = {}
+        disk_keys = []
+        with self._lock:
+            for text in texts:
+                key = (model, text)
+                vec = self._memory.get(key)
+                if vec is not None:
+                    self._memory.move_to_end(key)
+                    found[text] = vec
+                    self.memory_hits += 1
+                else:
+                    disk_keys.append(text)
+
+            if disk_keys and self._conn is not None:
+                placeholders = ",".join("?" for _ in disk_keys)
+                rows = self._conn.execute(
+                    f"SELECT text, vector FROM embeddings WHERE model=? AND text IN ({placeholders})",
+                    [model, *disk_keys],
+                ).fetchall()
+                for text, blob in rows:
+                    vec = np.frombuffer(blob, dtype=np.float32)
+                    found[text] = vec
+                    self._remember((model, text), vec)
+                    self.disk_hits += 1
+
+            self.misses += sum(1 for text in disk_keys if text not in found)
+        return found
+
+    # ── 저장 ────────────────────────────────────────────────────
+    def put_many(self, model: str, items: Dict[str, np.ndarray]) -> None:
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            for text, vec in items.items():
+                self._remember((model, text), np.asarray(vec, dtype=np.float32))
+
+            if self._conn is None:
+                return
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (model, text, dim, vector, created_at) VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (model, text, len(vec), np.asarray(vec, dtype=np.float32).tobytes(), now)
+                        for text, vec in items.items()
+                    ],
+                )
+                # 디스크 크기 제한 - 가장 오래된 항목부터 제거
+                count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+                if count > self.max_disk:
+                    self._conn.execute(
+                        "DELETE FROM embeddings WHERE rowid IN ("
+                        " SELECT rowid FROM embeddings ORDER BY created_at ASC LIMIT ?)",
+                        (count - self.max_disk,),
+                    )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logging.warning(f"임베딩 디스크 캐시 기록 실패: {e}")
+
+    def _remember(self, key: tuple, vec: np.ndarray) -> None:
+        """메모리 LRU에 추가 (호출자가 lock 보유)"""
+        self._memory[key] = vec
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory:
+            self._memory.popitem(last=False)
+
+    # ── 통계 ────────────────────────────────────────────────────
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            disk_size = 0
+            if self._conn is not None:
+                disk_size = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_ratio": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+                "memory_size": len(self._memory),
+                "disk_size": disk_size,
+            }
+
+
+# ─── 3) 캐시 경유 임베딩 ──────────────────────────────────────────────────
+def embed_with_cache(
+    cache: EmbeddingCache,
+    model: str,
+    texts: List[str],
+    embed_fn: Callable[[List[str]], List[List[float]]],
+) -> np.ndarray:
+    """
+    질의 목록을 (질의 수 × 차원) 행렬로 임베딩
+    캐시 미적중 질의만 모아 embed_fn 1회 호출 (전부 적중하면 네트워크 호출 없음)
+    """
+    keys = [normalize_query(t) for t in texts]
+    cached = cache.get_many(model, list(dict.fromkeys(keys)))
+
+    misses = [k for k in dict.fromkeys(keys) if k not in cached]
+    if misses:
+        fresh = {k: np.asarray(v, dtype=np.float32) for k, v in zip(misses, embed_fn(misses))}
+        cache.put_many(model, fresh)
+        cached.update(fresh)
+
+    return np.stack([cached[k] for k in keys])
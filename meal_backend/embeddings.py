@@ -0,0 +1,199 @@
+# ── embeddings.py ─────────────────────────────────────────────
+# 임베딩 백엔드 (인덱스 빌드와 서빙 질의가 공유) - llama-index 없이 동작
+#
+#   EMBED_BACKEND=openai                  OpenAI text-embedding-ada-002 (기본, 네트워크 호출)
+#   EMBED_BACKEND=hashing                 문자 n-gram 해싱 (CPU, 의존성 없음, 결정적)
+#   EMBED_BACKEND=sentence-transformers   로컬 다국어 문장 임베딩 모델 (sentence-transformers 설치 필요)
+#
+# 스냅샷 meta.json 에 embed_backend / embed_model 이 기록되며, 서빙은 스냅샷과 같은 백엔드로 질의를 임베딩한다.
+import os
+import unicodedata
+import zlib
+from typing import List, Optional
+
+import numpy as np
+
+from metrics import record_openai
+from rag_index import EMBED_MODEL, EMBED_BATCH
+
+EMBED_BACKEND   = os.getenv("EMBED_BACKEND", "openai")
+HASHING_DIM     = int(os.getenv("HASHING_EMBED_DIM", "1024"))
+HASHING_NGRAMS  = (1, 3)        # 문자 n-gram 범위 (한글은 음절 1글자도 의미 단위)
+ST_MODEL        = os.getenv("ST_EMBED_MODEL", "paraphrase-multilingual-MiniLM-L12-v2")
+
+
+# ─── 1) 공통 인터페이스 ───────────────────────────────────────────────────
+class Embedder:
+    """
+    get_text_embedding_batch(texts) → 텍스트별 벡터 (llama-index 임베딩 모델과 같은 시그니처)
+
+    • backend:   EMBED_BACKEND 값
+    • model_id:  같은 텍스트에 같은 벡터를 내는 단위의 식별자 (캐시 키, 스냅샷 호환성 확인용)
+    • cacheable: 질의 임베딩 캐시를 거칠 가치가 있는지 (로컬 계산이 캐시 조회보다 싸면 False)
+    """
+
+    backend = ""
+    model_id = ""
+    cacheable = True
+
+    def get_text_embedding_batch(self, texts: List[str]) -> List[List[float]]:
+        raise NotImplementedError
+
+
+# ─── 2) OpenAI ────────────────────────────────────────────────────────────
+class OpenAIEmbedder(Embedder):
+    """
+    OpenAI 임베딩 API 직접 호출
+    (llama-index OpenAIEmbedding 과 같은 모델·전처리 → 기존 llama-index 스냅샷과 호환)
+    """
+
+    backend = "openai"
+
+    def __init__(self, model: str = EMBED_MODEL, batch_size: int = EMBED_BATCH, client=None):
+        self.model = model
+        self.model_id = model
+        self.batch_size = batch_size
+        self._client = client
+
+    @property
+    def client(self):
+        if self._client is None:
+            from openai import OpenAI
+            self._client = OpenAI()
+        return self._client
+
+    def get_text_embedding_batch(self, texts: List[str]) -> List[List[float]]:
+        vectors: List[List[float]] = []
+        for start in range(0, len(texts), self.batch_size):
+            # llama-index 와 동일하게 줄바꿈은 공백으로 치환
+            chunk = [t.replace("\n", " ") for t in texts[start:start + self.batch_size]]
+            try:
+                resp = self.client.embeddings.create(model=self.model, input=chunk)
+            except Exception:
+                record_openai("embeddings", ok=False)
+                raise
+            record_openai("embeddings", resp.usage)
+            vectors.extend(d.embedding for d in sorted(resp.data, key=lambda d: d.index))
+        return vectors
+
+
+# ─── 3) 문자 n-gram 해싱 ──────────────────────────────────────────────────
+class HashingEmbedder(Embedder):
+    """
+    정규화한 텍스트의 문자 n-gram 을 crc32 로 dim 개 버킷에 부호 해싱 (feature hashing)
+
+    • 모델 파일·네트워크 없이 결정적 (같은 입력 → 항상 같은 벡터, 프로세스/머신 무관)
+    • 빈도는 1 + log(tf) 로 완화, 결과는 L2 정규화
+    • 의미 유사도는 없고 표기 유사도만 반영 - 오탈자·부분 일치 식품명 검색용
+    """
+
+    backend = "hashing"
+    cacheable = False
+
+    def __init__(self, dim: int = HASHING_DIM, ngrams=HASHING_NGRAMS):
+        self.dim = dim
+        self.ngrams = tuple(ngrams)
+        self.model_id = f"hashing-char{self.ngrams[0]}-{self.ngrams[1]}-d{dim}"
+
+    @classmethod
+    def from_model_id(cls, model_id: str) -> "HashingEmbedder":
+        """'hashing-char1-3-d1024' → HashingEmbedder(dim=1024, ngrams=(1, 3))"""
+        try:
+            grams, dim = model_id[len("hashing-char"):].split("-d")
+            low, high = grams.split("-")
+            return cls(dim=int(dim), ngrams=(int(low), int(high)))
+        except ValueError:
+            raise ValueError(f"해싱 임베딩 model_id 형식 오류: {model_id}")
+
+    def _features(self, text: str) -> List[str]:
+        text = unicodedata.normalize("NFC", text).lower()
+        grams = []
+        for token in text.split():
+            padded = f" {token} "
+            for n in range(self.ngrams[0], self.ngrams[1] + 1):
+                grams.extend(padded[i:i + n] for i in range(len(padded) - n + 1) if padded[i:i + n].strip())
+        return grams
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            counts = {}
+            for gram in self._features(text):
+                h = zlib.crc32(gram.encode("utf-8"))
+                bucket = h % self.dim
+                sign = 1.0 if (h >> 31) & 1 == 0 else -1.0
+                counts[bucket] = counts.get(bucket, 0.0) + sign
+            if counts:
+                idx = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+                val = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+                out[row, idx] = np.sign(val) * (1.0 + np.log(np.maximum(np.abs(val), 1.0)))
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return out / norms
+
+    def get_text_embedding_batch(self, texts: List[str]) -> List[List[float]]:
+        return self.embed(texts).tolist()
+
+
+# ─── 4) sentence-transformers (선택 의존성) ────────────────────────────────
+class SentenceTransformerEmbedder(Embedder):
+    """로컬 문장 임베딩 모델 - 처음 사용할 때 모델 로드 (CPU 기본)"""
+
+    backend = "sentence-transformers"
+
+    def __init__(self, model: str = ST_MODEL, batch_size: int = 64, device: Optional[str] = None):
+        self.model_name = model
+        self.model_id = f"st:{model}"
+        self.batch_size = batch_size
+        self.device = device
+        self._model = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            try:
+                from sentence_transformers import SentenceTransformer
+            except ImportError as e:
+                raise RuntimeError(
+                    "EMBED_BACKEND=sentence-transformers 는 sentence-transformers 패키지가 필요합니다"
+                ) from e
+            self._model = SentenceTransformer(self.model_name, device=self.device)
+        return self._model
+
+    def get_text_embedding_batch(self, texts: List[str]) -> List[List[float]]:
+        vectors = self.model.encode(
+            texts, batch_size=self.batch_size, normalize_embeddings=True, show_progress_bar=False,
+        )
+        return np.asarray(vectors, dtype=np.float32).tolist()
+
+
+# ─── 5) 선택 ──────────────────────────────────────────────────────────────
+BACKENDS = {
+    OpenAIEmbedder.backend: OpenAIEmbedder,
+    HashingEmbedder.backend: HashingEmbedder,
+    SentenceTransformerEmbedder.backend: SentenceTransformerEmbedder,
+}
+
+
+def get_embedder(backend: Optional[str] = None, model: Optional[str] = None) -> Embedder:
+    """
+    backend 이름(기본 EMBED_BACKEND)으로 임베딩 백엔드 생성
+    model: openai / sentence-transformers 의 모델명 (hashing 은 무시)
+    """
+    backend = (backend or EMBED_BACKEND).strip().lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"알 수 없는 EMBED_BACKEND: {backend} (가능: {', '.join(BACKENDS)})")
+    if backend == HashingEmbedder.backend or not model:
+        return BACKENDS[backend]()
+    return BACKENDS[backend](model=model)
+
+
+def embedder_for_meta(meta: dict) -> Embedder:
+    """스냅샷 meta.json 에 기록된 백엔드/모델로 임베딩 백엔드 생성 (기록이 없으면 OpenAI)"""
+    backend = meta.get("embed_backend", OpenAIEmbedder.backend)
+    model = meta.get("embed_model")
+    if backend == HashingEmbedder.backend:
+        return HashingEmbedder.from_model_id(model) if model else HashingEmbedder()
+    if backend == SentenceTransformerEmbedder.backend and model and model.startswith("st:"):
+        model = model[len("st:"):]
+    return get_embedder(backend, model)
@@ -0,0 +1,177 @@
+# ── food_db.py ────────────────────────────────────────────────
+# foods.db 공용 스키마 헬퍼 + 서빙용 연결 풀 (ingest_data.py 와 backend_main.py 에서 공유)
+import hashlib
+import logging
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+# ─── 1) FTS5 trigram 인덱스 ───────────────────────────────────────────────
+# foods.식품명 에 대한 외부 콘텐츠 FTS5 테이블 (부분 문자열 검색용 trigram 토크나이저)
+FTS_TABLE   = "foods_fts"
+FTS_MIN_LEN = 3             # trigram MATCH 는 3글자 이상 검색어에만 인덱스 사용 가능
+
+
+def fts5_trigram_supported() -> bool:
+    """SQLite 3.34+ 에서만 trigram 토크나이저 사용 가능"""
+    return sqlite3.sqlite_version_info >= (3, 34, 0)
+
+
+def has_fts_index(conn: sqlite3.Connection) -> bool:
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (FTS_TABLE,)
+    ).fetchone()
+    return row is not None
+
+
+def build_fts_index(conn: sqlite3.Connection) -> bool:
+    """foods_fts 를 (재)생성하고 foods 테이블 내용으로 채움. 지원되지 않으면 False"""
+    if not fts5_trigram_supported():
+        logging.warning(f"SQLite {sqlite3.sqlite_version} - FTS5 trigram 미지원, LIKE 검색을 사용합니다")
+        return False
+    conn.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    conn.execute(
+        f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+        " 식품명, content='foods', content_rowid='rowid', tokenize='trigram')"
+    )
+    conn.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES('rebuild')")
+    conn.commit()
+    return True
+
+
+def ensure_fts_index(db_path: str) -> bool:
+    """이전 버전 ingest로 만든 foods.db 라면 FTS 인덱스를 1회 생성 (오프라인 빌드 전용 - 읽기/쓰기 연결)"""
+    try:
+        with sqlite3.connect(db_path) as conn:
+            if has_fts_index(conn):
+                return True
+            logging.info(f"{FTS_TABLE} 인덱스가 없어 생성합니다: {db_path}")
+            return build_fts_index(conn)
+    except sqlite3.Error as e:
+        logging.warning(f"FTS 인덱스 확인/생성 실패: {e}")
+        return False
+
+
+def fts_phrase(token: str) -> str:
+    """MATCH 구문용 큰따옴표 phrase (trigram 에서는 부분 문자열 일치)"""
+    return '"' + token.replace('"', '""') + '"'
+
+
+# ─── 2) 안정 식품 ID / DB 버전 ────────────────────────────────────────────
+# foods.id (= rowid) 는 식품명·식품군에서 유도한 값 → 재적재해도 같은 식품은 같은 id
+# 벡터 스냅샷은 이 id 를 rowid 로 저장하므로 DB 를 갱신해도 엉뚱한 식품과 연결되지 않음
+ID_SCHEME  = "name-group-blake2b-v1"
+META_TABLE = "meta"
+
+
+def food_id(name: str, group: Optional[str], occurrence: int = 0) -> int:
+    """식품명 + 식품군 → 63비트 양의 정수 (같은 이름·군이 또 나오면 occurrence 로 구분)"""
+    key = f"{name}\x1f{group or ''}"
+    if occurrence:
+        key += f"\x1f{occurrence}"
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+    return (int.from_bytes(digest, "big") >> 1) or 1     # SQLite INTEGER 범위 (양수)
+
+
+def db_version(conn: sqlite3.Connection) -> str:
+    """foods 테이블 전체 내용의 해시 (id 순) - 내용이 같으면 재적재해도 같은 값"""
+    h = hashlib.blake2b(digest_size=16)
+    for row in conn.execute("SELECT * FROM foods ORDER BY id"):
+        h.update(repr(row).encode("utf-8"))
+    return h.hexdigest()
+
+
+def write_db_meta(conn: sqlite3.Connection, values: Dict[str, str]) -> None:
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {META_TABLE} (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+    conn.executemany(
+        f"INSERT OR REPLACE INTO {META_TABLE} (key, value) VALUES (?, ?)",
+        [(k, str(v)) for k, v in values.items()],
+    )
+
+
+def read_db_meta(conn: sqlite3.Connection) -> Dict[str, str]:
+    """meta 테이블 {key: value} (이전 ingest 로 만든 DB 라면 빈 dict)"""
+    try:
+        return dict(conn.execute(f"SELECT key, value FROM {META_TABLE}").fetchall())
+    except sqlite3.OperationalError:
+        return {}
+
+
+# ─── 3) 서빙용 연결 풀 ────────────────────────────────────────────────────
+# 서빙 중 foods.db 는 읽기 전용 → 읽기 전용 연결을 미리 열어 두고 재사용
+POOL_SIZE        = int(os.getenv("DB_POOL_SIZE", "8"))
+MMAP_SIZE        = int(os.getenv("DB_MMAP_SIZE", str(256 * 1024 * 1024)))   # bytes
+CACHE_SIZE_KB    = int(os.getenv("DB_CACHE_SIZE_KB", str(64 * 1024)))       # 연결당 page cache
+CACHED_STATEMENTS = 256     # 연결별 prepared statement 캐시 크기 (같은 SQL 문자열 재사용)
+
+
+def enable_wal(conn: sqlite3.Connection) -> None:
+    """WAL 모드는 DB 파일에 기록되므로 ingest 시 1회 설정"""
+    conn.execute("PRAGMA journal_mode=WAL")
+
+
+def open_read_connection(db_path: str) -> sqlite3.Connection:
+    """읽기 전용 URI + 조회용 pragma 가 적용된 연결"""
+    uri = f"file:{os.path.abspath(db_path)}?mode=ro"
+    conn = sqlite3.connect(
+        uri,
+        uri=True,
+        check_same_thread=False,            # 풀에서 스레드 간 이동 (동시에 한 스레드만 사용)
+        cached_statements=CACHED_STATEMENTS,
+    )
+    conn.execute("PRAGMA query_only=1")
+    conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+    conn.execute(f"PRAGMA cache_size=-{CACHE_SIZE_KB}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    return conn
+
+
+class ConnectionPool:
+    """
+    스레드 안전 연결 풀
+    • 필요할 때 최대 size 개까지 연결 생성, 이후에는 반납된 연결 재사용
+    • 모든 연결이 사용 중이면 반납될 때까지 대기
+    """
+
+    def __init__(self, db_path: str, size: int = POOL_SIZE):
+        self.db_path = db_path
+        self.size = size
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    def _acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                try:
+                    return open_read_connection(self.db_path)
+                except Exception:
+                    self._created -= 1
+                    raise
+        return self._idle.get()
+
+    def close(self) -> None:
+        """열린 연결 모두 닫기 (DB 교체 후 재연결 시)"""
+        with self._lock:
+            while True:
+                try:
+                    self._idle.get_nowait().close()
+                except queue.Empty:
+                    break
+            self._created = 0
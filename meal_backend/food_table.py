@@ -0,0 +1,68 @@
+# ── food_table.py ─────────────────────────────────────────────
+# 기동 시 foods 테이블을 메모리 컬럼 배열로 적재 (서빙 중 foods.db 는 읽기 전용)
+import logging
+import sqlite3
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+FoodRow = Tuple[str, float, float, float, float]   # (식품명, kcal, carb, prot, fat)
+
+MACRO_COLUMNS = ("에너지kcal", "탄수화물g", "단백질g", "지방g")
+
+
+class FoodTable:
+    """
+    foods 테이블의 컬럼형 사본
+
+    • names / groups: 식품명, 식품군 (list)
+    • macros:         (행 수 × 4) float64 - kcal, carb, prot, fat (100 g 기준)
+    • rowids:         foods.rowid (int64)
+    • rowid_to_idx:   rowid → 행 번호
+    """
+
+    def __init__(self, rowids, names: List[str], groups: List[str], macros: np.ndarray):
+        self.rowids = np.asarray(rowids, dtype=np.int64)
+        self.names = names
+        self.groups = groups
+        self.macros = np.ascontiguousarray(macros, dtype=np.float64)
+        self.rowid_to_idx: Dict[int, int] = {int(r): i for i, r in enumerate(self.rowids)}
+
+    def __len__(self) -> int:
+        return len(self.rowids)
+
+    # ── 로드 ────────────────────────────────────────────────────
+    @classmethod
+    def load(cls, conn: sqlite3.Connection) -> "FoodTable":
+        rows = conn.execute(
+            "SELECT rowid, 식품명, 식품군, " + ", ".join(MACRO_COLUMNS) + " FROM foods ORDER BY rowid"
+        ).fetchall()
+        rowids = [r[0] for r in rows]
+        names = [r[1] for r in rows]
+        groups = [r[2] for r in rows]
+        macros = np.array([[_to_float(v) for v in r[3:]] for r in rows], dtype=np.float64).reshape(-1, 4)
+        table = cls(rowids, names, groups, macros)
+        logging.info(f"FoodTable 메모리 적재: {len(table)}행 ({table.macros.nbytes / 1024:.0f} KB 영양 배열)")
+        return table
+
+    # ── 조회 ────────────────────────────────────────────────────
+    def row(self, idx: int) -> FoodRow:
+        kcal, carb, prot, fat = self.macros[idx].tolist()
+        return self.names[idx], kcal, carb, prot, fat
+
+    def rows_by_rowids(self, rowids: Iterable[int]) -> Dict[int, FoodRow]:
+        """{rowid: (식품명, kcal, carb, prot, fat)} - 없는 rowid는 생략"""
+        found = {}
+        for rowid in rowids:
+            idx = self.rowid_to_idx.get(rowid)
+            if idx is not None:
+                found[rowid] = self.row(idx)
+        return found
+
+
+def _to_float(value) -> float:
+    """엑셀 원본의 '-' 같은 비수치 값은 0으로 처리"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
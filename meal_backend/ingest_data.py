@@ -1,15 +1,182 @@
-import pandas as pd, sqlite3, pathlib
+# ── ingest_data.py ────────────────────────────────────────────
+# Food_DB.xlsx → foods.db (openpyxl 읽기 전용 스트리밍 + 배치 INSERT)
+#
+# • 엑셀을 행 단위로 읽어 INGEST_BATCH 행씩 executemany (전체를 메모리에 올리지 않음)
+# • 임시 파일 foods.db.tmp 에 작성 → 인덱스 / FTS / ANALYZE 후 foods.db 로 교체
+#   (교체 후 서빙 워커는 재시작하거나 연결 풀을 다시 열어야 새 DB 를 봄)
+import os
+import pathlib
+import sqlite3
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
-DB_PATH = pathlib.Path("foods.db")
-EXCEL    = pathlib.Path("Food_DB.xlsx")
+from openpyxl import load_workbook
 
-df = pd.read_excel(EXCEL, engine="openpyxl")
+from food_db import ID_SCHEME, build_fts_index, db_version, enable_wal, food_id, write_db_meta
 
-# 필요한 열만 미리 얇게 만들어 두면 추후 속도 ↑
-keep_cols = ["식품명", "식품군", "에너지kcal", "탄수화물g", "단백질g", "지방g"]
-df = df[keep_cols]
+DB_PATH      = pathlib.Path("foods.db")
+EXCEL        = pathlib.Path("Food_DB.xlsx")
+INGEST_BATCH = int(os.getenv("INGEST_BATCH", "5000"))     # 트랜잭션당 INSERT 행 수
 
-with sqlite3.connect(DB_PATH) as conn:
-    df.to_sql("foods", conn, if_exists="replace", index=False)
+ID_COLUMN    = "고유번호"
+TEXT_COLUMNS = ("식품명", "식품군")
+REAL_COLUMNS = ("에너지kcal", "탄수화물g", "단백질g", "지방g")   # 100 g 기준 영양값
 
-print("✅ foods.db 작성 완료, 행 수:", len(df))
\ No newline at end of file
+SCHEMA = (
+    "CREATE TABLE foods ("
+    " id INTEGER PRIMARY KEY,"          # food_id(식품명, 식품군) - rowid 별칭, 벡터 스냅샷의 rowid 와 같은 값
+    " 고유번호 INTEGER,"                 # 원본 시트 번호 (참고용, 재적재 시 바뀔 수 있음)
+    " 식품명 TEXT NOT NULL,"
+    " 식품군 TEXT,"
+    + ",".join(f" {col} REAL NOT NULL DEFAULT 0" for col in REAL_COLUMNS)
+    + ")"
+)
+INDEXES = (
+    "CREATE INDEX idx_foods_name ON foods(식품명)",
+    "CREATE INDEX idx_foods_group ON foods(식품군)",
+)
+
+FoodRecord = Tuple[int, Optional[int], str, Optional[str], float, float, float, float]
+
+
+# ─── 1) 엑셀 스트리밍 ─────────────────────────────────────────────────────
+def read_records(excel_path: pathlib.Path) -> Iterator[FoodRecord]:
+    """첫 시트를 한 행씩 읽어 (id, 고유번호, 식품명, 식품군, kcal, carb, prot, fat) 생성"""
+    wb = load_workbook(excel_path, read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = [str(h).strip() if h is not None else "" for h in next(rows)]
+        missing = [c for c in (*TEXT_COLUMNS, *REAL_COLUMNS) if c not in header]
+        if missing:
+            raise ValueError(f"엑셀에 필요한 열이 없습니다: {', '.join(missing)}")
+
+        id_idx = header.index(ID_COLUMN) if ID_COLUMN in header else None
+        text_idx = [header.index(c) for c in TEXT_COLUMNS]
+        real_idx = [header.index(c) for c in REAL_COLUMNS]
+
+        seen: Dict[Tuple[str, Optional[str]], int] = {}
+        for row in rows:
+            name = row[text_idx[0]]
+            if name is None or not str(name).strip():
+                continue                    # 빈 행 (시트 끝 서식만 남은 행 등)
+            name = str(name).strip()
+            group = _to_text(row[text_idx[1]])
+            occurrence = seen.get((name, group), 0)
+            seen[(name, group)] = occurrence + 1
+            yield (
+                food_id(name, group, occurrence),
+                _to_int(row[id_idx]) if id_idx is not None else None,
+                name,
+                group,
+                *(_to_real(row[i]) for i in real_idx),
+            )
+    finally:
+        wb.close()
+
+
+def _to_int(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_text(value) -> Optional[str]:
+    return None if value is None else str(value).strip()
+
+
+def _to_real(value) -> float:
+    """엑셀 원본의 '-' (미측정) 같은 비수치 값은 0으로 저장"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+# ─── 2) 적재 ──────────────────────────────────────────────────────────────
+def ingest(excel_path: pathlib.Path = EXCEL, db_path: pathlib.Path = DB_PATH, batch: int = INGEST_BATCH) -> int:
+    """엑셀 → 임시 DB 작성 후 db_path 로 원자적 교체. 적재한 행 수 반환"""
+    return write_db(read_records(excel_path), db_path, source=excel_path.name, batch=batch)
+
+
+def write_db(records: Iterable[FoodRecord], db_path: pathlib.Path = DB_PATH, source: str = EXCEL.name,
+             batch: int = INGEST_BATCH) -> int:
+    """
+    FoodRecord 스트림 → 임시 DB 작성 후 db_path 로 원자적 교체. 적재한 행 수 반환
+    (엑셀 적재와 벤치마크 픽스처 DB 가 같은 스키마 / 인덱스 / meta 를 갖도록 공용)
+    """
+    t0 = time.time()
+    db_path = pathlib.Path(db_path)
+    tmp_path = db_path.with_name(db_path.name + ".tmp")
+    for path in (tmp_path, *_sidecars(tmp_path)):
+        path.unlink(missing_ok=True)
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        # 임시 파일이므로 저널/동기화 없이 작성 (실패하면 파일을 버림)
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute(SCHEMA)
+
+        insert = (
+            f"INSERT INTO foods (id, {ID_COLUMN}, {', '.join(TEXT_COLUMNS + REAL_COLUMNS)})"
+            f" VALUES ({', '.join(['?'] * (2 + len(TEXT_COLUMNS) + len(REAL_COLUMNS)))})"
+        )
+        total = 0
+        pending: List[FoodRecord] = []
+        for record in records:
+            pending.append(record)
+            if len(pending) >= batch:
+                total += _flush(conn, insert, pending)
+        total += _flush(conn, insert, pending)
+
+        for sql in INDEXES:
+            conn.execute(sql)
+        # 식품명 부분 문자열 검색용 FTS5 trigram 인덱스
+        if build_fts_index(conn):
+            print("✅ foods_fts (FTS5 trigram) 인덱스 생성 완료")
+        # 벡터 스냅샷과의 버전 확인용 (build_index.py 가 스냅샷 meta.json 에 기록)
+        write_db_meta(conn, {
+            "id_scheme": ID_SCHEME,
+            "db_version": db_version(conn),
+            "row_count": total,
+            "source": source,
+            "created_at": time.time(),
+        })
+        conn.execute("ANALYZE")
+        conn.commit()
+        # 서빙 워커들이 읽기 전용으로 동시에 여는 DB → WAL 모드
+        conn.execute("PRAGMA synchronous=FULL")
+        enable_wal(conn)
+    except Exception:
+        conn.close()
+        tmp_path.unlink(missing_ok=True)
+        raise
+    conn.close()        # 마지막 연결이 닫히면서 WAL 체크포인트 + -wal/-shm 정리
+
+    # 이전 DB 의 -wal/-shm 이 새 DB 에 적용되지 않도록 먼저 제거
+    for path in _sidecars(db_path):
+        path.unlink(missing_ok=True)
+    os.replace(tmp_path, db_path)
+    print(f"⏱️  {time.time() - t0:.1f}s")
+    return total
+
+
+def _flush(conn: sqlite3.Connection, insert: str, pending: List[FoodRecord]) -> int:
+    """한 트랜잭션으로 배치 INSERT 후 버퍼 비움"""
+    if not pending:
+        return 0
+    count = len(pending)
+    with conn:
+        conn.executemany(insert, pending)
+    pending.clear()
+    return count
+
+
+def _sidecars(db_path: pathlib.Path) -> List[pathlib.Path]:
+    return [db_path.with_name(db_path.name + suffix) for suffix in ("-wal", "-shm", "-journal")]
+
+
+if __name__ == "__main__":
+    rows = ingest()
+    print("✅ foods.db 작성 완료, 행 수:", rows)
@@ -0,0 +1,166 @@
+# ── log_setup.py ──────────────────────────────────────────────
+# 서빙 로깅: 백그라운드 큐 핸들러 + 요청당 요약 레코드 1개 + 상세(DEBUG) 로그 샘플링
+#
+#   LOG_LEVEL=INFO          기본 레벨 (DEBUG 면 모든 요청의 상세 로그 출력)
+#   LOG_FORMAT=text|json    json 은 한 줄에 레코드 1개 (요약 필드 포함)
+#   LOG_QUEUE=1             QueueHandler → QueueListener 스레드에서 포맷·출력 (이벤트 루프가 stdout 에 막히지 않음)
+#   LOG_SAMPLE_RATE=0.01    요청 중 이 비율만 상세(DEBUG) 로그 출력 (0 이면 끔)
+#
+# 핫패스 로그는 logging.debug("... %s", 값) 처럼 %-인자로 넘겨 레코드가 버려지면 문자열을 만들지 않는다.
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+LOG_LEVEL       = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT      = os.getenv("LOG_FORMAT", "text")
+LOG_QUEUE       = os.getenv("LOG_QUEUE", "1") == "1"
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0"))
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# 루트를 DEBUG 로 열어도 DEBUG 레코드를 만들지 않도록 LOG_LEVEL 에 고정하는 외부 라이브러리 로거
+QUIET_LOGGERS = ("httpx", "httpcore", "openai", "urllib3", "asyncio", "multipart", "uvicorn")
+
+# 처리 중인 요청의 요약 필드 (미들웨어가 만들고 핸들러가 annotate 로 채움)
+_request: ContextVar[Optional[Dict]] = ContextVar("request_log", default=None)
+_listener: Optional[QueueListener] = None
+
+
+# ─── 1) 포맷 ──────────────────────────────────────────────────────────────
+class TextFormatter(logging.Formatter):
+    """기존 형식 + 요약 필드를 key=value 로 덧붙임"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += " " + " ".join(f"{k}={_text_value(v)}" for k, v in fields.items())
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    """레코드 1개 → JSON 한 줄 (요약 필드는 최상위 키)"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        data.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+def _text_value(value) -> str:
+    if isinstance(value, dict):
+        return ",".join(f"{k}:{v}" for k, v in value.items())
+    if isinstance(value, float):
+        return f"{value:.1f}"
+    return str(value)
+
+
+# ─── 2) 큐 핸들러 / 샘플링 ───────────────────────────────────────────────
+class _DeferredQueueHandler(QueueHandler):
+    """
+    같은 프로세스 안의 큐이므로 레코드를 그대로 넘김
+    (기본 QueueHandler.prepare 는 호출 스레드에서 메시지를 포맷함 → 포맷도 리스너 스레드로 미룸)
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class _SampleFilter(logging.Filter):
+    """level 미만(DEBUG) 레코드는 샘플링된 요청 안에서만 통과"""
+
+    def __init__(self, level: int):
+        super().__init__()
+        self.level = level
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= self.level:
+            return True
+        ctx = _request.get()
+        return ctx is not None and ctx["sampled"]
+
+
+def configure_logging(
+    level: str = LOG_LEVEL,
+    fmt: str = LOG_FORMAT,
+    use_queue: bool = LOG_QUEUE,
+    sample_rate: float = LOG_SAMPLE_RATE,
+) -> None:
+    """루트 로거 구성 (기존 핸들러 교체). 여러 번 호출해도 리스너는 1개"""
+    global _listener
+    level_no = logging.getLevelName(level) if isinstance(level, str) else level
+    if not isinstance(level_no, int):
+        level_no = logging.INFO
+
+    stream = logging.StreamHandler()
+    stream.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter(TEXT_FORMAT))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    stop_logging()
+
+    if use_queue:
+        records: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        handler: logging.Handler = _DeferredQueueHandler(records)
+        _listener = QueueListener(records, stream, respect_handler_level=True)
+        _listener.start()
+    else:
+        handler = stream
+
+    # 샘플링: 루트는 DEBUG 까지 열고, 샘플링되지 않은 요청의 DEBUG 레코드는 큐에 넣기 전에 버림
+    if sample_rate > 0 and level_no > logging.DEBUG:
+        root.setLevel(logging.DEBUG)
+        handler.addFilter(_SampleFilter(level_no))
+        for name in QUIET_LOGGERS:
+            logger = logging.getLogger(name)
+            if logger.level == logging.NOTSET:
+                logger.setLevel(level_no)
+    else:
+        root.setLevel(level_no)
+    root.addHandler(handler)
+
+
+@atexit.register
+def stop_logging() -> None:
+    """큐에 남은 레코드를 모두 출력하고 리스너 스레드 종료 (프로세스 종료 시 자동 호출)"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+# ─── 3) 요청 요약 ─────────────────────────────────────────────────────────
+def start_request(method: str, path: str, sample_rate: float = LOG_SAMPLE_RATE) -> Dict:
+    """요청 시작 - 이 요청의 상세 로그 샘플링 여부를 정하고 요약 필드 dict 반환"""
+    ctx = {"sampled": sample_rate > 0 and random.random() < sample_rate, "fields": {"method": method, "path": path}}
+    _request.set(ctx)
+    return ctx
+
+
+def annotate(**fields) -> None:
+    """처리 중인 요청의 요약 레코드에 필드 추가 (요청 밖에서는 무시)"""
+    ctx = _request.get()
+    if ctx is not None:
+        ctx["fields"].update(fields)
+
+
+def log_request_summary(ctx: Dict, status: int, seconds: float) -> None:
+    """요청당 INFO 레코드 1개 - 요청 처리 중 annotate 한 필드 포함"""
+    fields = dict(ctx["fields"], status=status, ms=round(seconds * 1000, 1))
+    if ctx["sampled"]:
+        fields["sampled"] = True
+    logging.getLogger("request").info("요청 완료", extra={"fields": fields})
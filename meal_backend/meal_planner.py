@@ -0,0 +1,128 @@
+# ── meal_planner.py ───────────────────────────────────────────
+# 식품 × 영양소 NumPy 배열로 하루 섭취량(g) 배분, 끼니·일자별 분할과 합계 계산
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+MEAL_TYPES = ("아침", "점심", "저녁", "간식")
+BASE_GRAMS = 100.0          # 식품당 최소 배정량 (g)
+
+
+class MealPlan:
+    """
+    • names:        식품명 (n)
+    • grams:        하루 배정량 g (n)
+    • macros:       하루 배정량 기준 (n × 4) - kcal, 탄수, 단백, 지방
+    • meal_grams:   끼니별 배정량 (끼니 수 × n)
+    • meal_totals:  끼니별 영양 합계 (끼니 수 × 4)
+    • day_totals:   일자별 영양 합계 (기간 × 4)
+    """
+
+    def __init__(self, names: List[str], grams: np.ndarray, macros: np.ndarray, meals: int, period: int = 1):
+        self.names = names
+        self.grams = grams
+        self.macros = macros
+        self.meals = meals
+        self.period = period
+
+        # 끼니별 균등 분할 - 항목마다 0.1 g / 0.1 단위 반올림 후 식품 순서대로 합산
+        split_grams = round1(grams / meals)
+        split_macros = round1(macros / meals)
+        self.meal_grams = np.broadcast_to(split_grams, (meals, len(names)))
+        meal_total = np.array([sum(col) for col in split_macros.T.tolist()], dtype=np.float64)
+        self.meal_totals = np.broadcast_to(meal_total, (meals, 4))
+        self.day_totals = np.broadcast_to(self.meal_totals.sum(axis=0), (period, 4))
+
+    # ── 응답 변환 ───────────────────────────────────────────────
+    def items(self) -> List[Dict[str, object]]:
+        """클라이언트용 식단 항목 (일자 → 끼니 → 식품 순, 영양값은 해당 끼니 합계)"""
+        grams = self.meal_grams.tolist()
+        totals = round1(self.meal_totals).tolist()
+        out = []
+        for _ in range(self.period):
+            for m_idx in range(self.meals):
+                kcal, c, p, f = totals[m_idx]
+                meal_type = MEAL_TYPES[m_idx % len(MEAL_TYPES)]
+                out.extend(
+                    {
+                        "meal_type": meal_type,
+                        "food_name": name,
+                        "amount": g,
+                        "calories": kcal,
+                        "carbs": c,
+                        "protein": p,
+                        "fat": f,
+                    }
+                    for name, g in zip(self.names, grams[m_idx])
+                )
+        return out
+
+    def markdown(self) -> str:
+        """일자별 마크다운 표 (이전 버전 호환 rawMarkdown)"""
+        grams = self.meal_grams.tolist()
+        totals = round1(self.meal_totals).tolist()
+        days = []
+        for day in range(1, self.period + 1):
+            table = [
+                f"### {day}일차",
+                "| 식사 | 음식명 | g | kcal | 탄수 | 단백 | 지방 |",
+                "|:---:|:------|---:|-----:|-----:|-----:|-----:|",
+            ]
+            for m_idx in range(self.meals):
+                kcal, c, p, f = totals[m_idx]
+                table.extend(
+                    f"| {m_idx + 1} | {name} | {g} | {kcal} | {c} | {p} | {f} |"
+                    for name, g in zip(self.names, grams[m_idx])
+                )
+            days.append("\n".join(table))
+        return "\n\n".join(days)
+
+
+def round1(values: np.ndarray) -> np.ndarray:
+    """
+    소수 첫째 자리 반올림 - 파이썬 round(x, 1) 과 같은 결과
+    np.round 는 x*10 에서 오차가 생겨 .x5 경계에서 다르게 반올림될 수 있으므로 경계 근처 값만 round() 로 재계산
+    """
+    values = np.asarray(values, dtype=np.float64)
+    scaled = values * 10
+    out = np.rint(scaled) / 10
+    frac = np.abs(scaled - np.floor(scaled) - 0.5)
+    near = frac < 1e-6
+    if near.any():
+        out[near] = [round(v, 1) for v in values[near].tolist()]
+    return out
+
+
+def plan_meals(rows: Sequence[tuple], target_kcal: float, meals: int, period: int = 1) -> MealPlan:
+    """
+    (식품명, kcal, carb, prot, fat) 100 g 기준 행 → MealPlan
+
+    1) 같은 식품명은 1회만 (마지막 행 값 사용, 처음 나온 순서 유지)
+    2) 식품마다 100 g 배정
+    3) 목표 열량이 남으면 남은 kcal 을 식품별 kcal 비중대로 나눠 g 추가
+       (비중 = kcal_i / Σkcal 이므로 모든 식품에 같은 비율 remain / Σkcal 만큼 증량)
+    """
+    uniq = {r[0]: r for r in rows}
+    names = list(uniq)
+    per100 = np.array([[float(v) for v in r[1:5]] for r in uniq.values()], dtype=np.float64).reshape(-1, 4)
+
+    grams = np.full(len(names), BASE_GRAMS)
+    macros = per100.copy()                       # 100 g 기준 = 기본 배정량의 영양값
+
+    # 합계는 파이썬 순차 합산 (np.sum 은 합산 순서가 달라 마지막 자리 오차로 0.1 반올림이 바뀔 수 있음)
+    kcal_list = per100[:, 0].tolist()
+    total_kcal = sum(kcal_list)
+    remain = target_kcal
+    for value in kcal_list:
+        remain -= value
+    if remain > 0 and total_kcal > 0:
+        kcal = per100[:, 0]
+        share = remain * kcal / total_kcal                    # 식품별 추가 kcal
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # 0 kcal 식품도 같은 비율로 증량 (비율 = remain / Σkcal)
+            extra_g = np.where(kcal > 0, share / kcal * BASE_GRAMS, remain / total_kcal * BASE_GRAMS)
+        grams = grams + round1(extra_g)
+        macros[:, 0] += round1(share)
+        macros[:, 1:] += round1(per100[:, 1:] * extra_g[:, None] / BASE_GRAMS)
+
+    return MealPlan(names, grams, macros, meals, period)
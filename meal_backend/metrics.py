@@ -0,0 +1,274 @@
+# ── metrics.py ────────────────────────────────────────────────
+# 단계별 지연 히스토그램 / 카운터 → Prometheus 텍스트 형식 (/metrics), 외부 의존성 없음
+#
+# • 핫패스 비용: 관측 1회 = perf_counter 2회 + bisect + 잠금 1회 (수 µs 미만)
+# • 캐시 적중률 같은 값은 관측하지 않고 수집(scrape) 시점에 콜백으로 읽음 (수집 1회에 1번)
+# • METRICS_ENABLED=0 이면 관측을 모두 건너뜀 (/metrics 는 빈 값)
+import bisect
+import math
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+PREFIX = "meal_"
+
+# 초 단위 - SQLite 조회(수백 µs) 부터 GPT 호출(수 초) 까지
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Sample = Tuple[str, Dict[str, str], float]       # (이름 접미사, 라벨, 값)
+
+
+# ─── 1) 메트릭 타입 ───────────────────────────────────────────────────────
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = PREFIX + name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def samples(self) -> List[Sample]:
+        raise NotImplementedError
+
+    def _labels(self, values: tuple) -> Dict[str, str]:
+        return dict(zip(self.labelnames, values))
+
+
+class Counter(_Metric):
+    """단조 증가 카운터 - inc(*라벨값, amount=1)"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[tuple, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        if not METRICS_ENABLED:
+            return
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            return [("_total", self._labels(k), v) for k, v in self._values.items()]
+
+
+class Histogram(_Metric):
+    """
+    누적 버킷 히스토그램 - observe(값, *라벨값), time(*라벨값) 으로 with 블록 시간 관측
+    버킷별 개수는 비누적으로 저장하고 출력할 때 누적
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[tuple, list] = {}       # 라벨 → [버킷별 개수 (+Inf 포함), 합계, 개수]
+
+    def observe(self, value: float, *labels: str) -> None:
+        if not METRICS_ENABLED:
+            return
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][idx] += 1
+            series[1] += value
+            series[2] += 1
+
+    def time(self, *labels: str) -> "_Timer":
+        return _Timer(self, labels)
+
+    def samples(self) -> List[Sample]:
+        out: List[Sample] = []
+        with self._lock:
+            for key, (counts, total, count) in self._series.items():
+                labels = self._labels(key)
+                cumulative = 0
+                for bound, n in zip(self.buckets + (math.inf,), counts):
+                    cumulative += n
+                    out.append(("_bucket", {**labels, "le": _format_bound(bound)}, cumulative))
+                out.append(("_sum", labels, total))
+                out.append(("_count", labels, count))
+        return out
+
+
+class Gauge(_Metric):
+    """수집 시점에 fn() 이 돌려주는 {라벨값 튜플: 값} 을 출력"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str], fn: Callable[[], Dict[tuple, float]]):
+        super().__init__(name, help, labelnames)
+        self.fn = fn
+
+    def samples(self) -> List[Sample]:
+        return [("", self._labels(k), v) for k, v in self.fn().items()]
+
+
+class _Timer:
+    __slots__ = ("hist", "labels", "t0")
+
+    def __init__(self, hist: Histogram, labels: tuple):
+        self.hist = hist
+        self.labels = labels
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.hist.observe(time.perf_counter() - self.t0, *self.labels)
+        return False
+
+
+# ─── 2) 레지스트리 / 출력 ─────────────────────────────────────────────────
+_registry: List[_Metric] = []
+_registry_lock = threading.Lock()
+_scrape_hooks: List[Callable[[], None]] = []     # 수집 1회마다 출력 전에 1번씩 호출
+
+
+def on_scrape(fn: Callable[[], None]) -> Callable[[], None]:
+    """render() 시작 시 1회 호출할 함수 등록 (여러 게이지가 같은 값을 읽을 때 미리 한 번만 읽어 둠)"""
+    with _registry_lock:
+        _scrape_hooks.append(fn)
+    return fn
+
+
+def register(metric: _Metric) -> _Metric:
+    with _registry_lock:
+        _registry[:] = [m for m in _registry if m.name != metric.name] + [metric]
+    return metric
+
+
+def render() -> str:
+    """Prometheus 텍스트 형식 (version 0.0.4)"""
+    lines: List[str] = []
+    with _registry_lock:
+        metrics = list(_registry)
+        hooks = list(_scrape_hooks)
+    for hook in hooks:
+        try:
+            hook()
+        except Exception as e:
+            lines.append(f"# 수집 전처리 실패: {e}")
+    for metric in metrics:
+        try:
+            samples = metric.samples()
+        except Exception as e:          # 콜백 실패가 /metrics 전체를 깨지 않도록
+            lines.append(f"# {metric.name} 수집 실패: {e}")
+            continue
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for suffix, labels, value in samples:
+            lines.append(f"{metric.name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = (
+        k + '="' + str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for k, v in labels.items()
+    )
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if bound == math.inf else repr(float(bound))
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, int):
+        return str(value)
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+# ─── 3) 서빙 메트릭 ───────────────────────────────────────────────────────
+# 단계: embedding / vector_search / hydration / keyword_search / gpt / planning / serialization
+STAGE_SECONDS = register(Histogram(
+    "stage_seconds", "/recommend 처리 단계별 소요 시간 (초)", ["stage"],
+))
+HTTP_SECONDS = register(Histogram(
+    "http_request_seconds", "HTTP 요청 처리 시간 (초)", ["method", "route", "status"],
+))
+RESOLVE_SOURCE = register(Counter(
+    "ingredient_resolutions", "재료 해석 결과 단계별 횟수 (rag / db / gpt / none)", ["source"],
+))
+OPENAI_REQUESTS = register(Counter(
+    "openai_requests", "OpenAI API 호출 횟수", ["endpoint", "outcome"],
+))
+OPENAI_TOKENS = register(Counter(
+    "openai_tokens", "OpenAI API 사용 토큰 수", ["endpoint", "kind"],
+))
+
+
+def stage(name: str) -> _Timer:
+    """with stage("embedding"): ... - 단계 소요 시간 관측"""
+    return _Timer(STAGE_SECONDS, (name,))
+
+
+def record_openai(endpoint: str, usage=None, ok: bool = True) -> None:
+    """OpenAI 응답의 usage(prompt_tokens / completion_tokens) 를 토큰 카운터에 반영"""
+    OPENAI_REQUESTS.inc(endpoint, "ok" if ok else "error")
+    if usage is None:
+        return
+    for kind in ("prompt_tokens", "completion_tokens"):
+        value = getattr(usage, kind, None)
+        if value:
+            OPENAI_TOKENS.inc(endpoint, kind[:-len("_tokens")], amount=value)
+
+
+def register_cache_stats(caches: Dict[str, Callable[[], Dict[str, float]]]) -> None:
+    """
+    캐시 이름 → stats() 함수 등록 - 수집 시점에 적중/미적중/적중률 게이지로 출력
+    (stats() 의 hits 또는 memory_hits + disk_hits 를 적중으로 봄)
+    stats() 는 디스크 캐시 COUNT(*) 를 포함하므로 수집 1회에 캐시당 1번만 읽고 게이지 4개가 공유
+    """
+    snapshot: Dict[str, Dict[str, float]] = {}
+
+    @on_scrape
+    def read() -> None:
+        fresh = {}
+        for name, fn in caches.items():
+            try:
+                fresh[name] = fn()
+            except Exception:
+                continue            # 읽지 못한 캐시는 이번 수집에서 생략
+        snapshot.clear()
+        snapshot.update(fresh)
+
+    def field(getter: Callable[[Dict[str, float]], Optional[float]]) -> Callable[[], Dict[tuple, float]]:
+        def collect() -> Dict[tuple, float]:
+            out = {}
+            for name, stats in list(snapshot.items()):
+                value = getter(stats)
+                if value is not None:
+                    out[(name,)] = value
+            return out
+        return collect
+
+    register(Gauge("cache_hits", "캐시 적중 수 (프로세스 시작 이후)", ["cache"], field(_cache_hits)))
+    register(Gauge("cache_misses", "캐시 미적중 수 (프로세스 시작 이후)", ["cache"], field(lambda s: s.get("misses"))))
+    register(Gauge("cache_hit_ratio", "캐시 적중률 (0~1)", ["cache"], field(lambda s: s.get("hit_ratio"))))
+    register(Gauge("cache_entries", "캐시 항목 수", ["cache"],
+                   field(lambda s: s.get("size", s.get("memory_size")))))
+
+
+def _cache_hits(stats: Dict[str, float]) -> Optional[float]:
+    if "hits" in stats:
+        return stats["hits"]
+    if "memory_hits" in stats:
+        return stats["memory_hits"] + stats.get("disk_hits", 0)
+    return None
+
@@ -0,0 +1,165 @@
+# ── nutrition_cache.py ────────────────────────────────────────
+# GPT 영양 추정 결과 캐시 (별도 SQLite 파일) + 동일 재료 동시 요청 single‑flight
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+# ─── 1) 설정 ──────────────────────────────────────────────────────────────
+# foods.db는 ingest 때마다 교체되므로 캐시는 별도 파일에 둔다
+NUTRITION_CACHE_PATH = os.getenv("NUTRITION_CACHE_PATH", "nutrition_cache.db")
+NUTRITION_CACHE_TTL  = float(os.getenv("NUTRITION_CACHE_TTL", str(90 * 24 * 3600)))  # 초, 0 이하면 만료 없음
+
+NutritionRow = Tuple[str, float, float, float, float]   # (식품명, kcal, carb, prot, fat)
+
+
+# ─── 2) 영구 캐시 ─────────────────────────────────────────────────────────
+class NutritionCache:
+    """
+    정규화된 재료명 → 100 g 기준 (kcal, carb, prot, fat)
+
+    • source: 값의 출처 (예: 'gpt')
+    • model:  추정에 사용한 모델명
+    • TTL이 지난 항목은 조회되지 않음 (다음 요청에서 다시 추정 후 덮어씀)
+    """
+
+    def __init__(self, path: Optional[str] = NUTRITION_CACHE_PATH, ttl: float = NUTRITION_CACHE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        # 디스크 캐시를 열 수 없으면 프로세스 메모리에만 보관 (재료명 → (행, 기록 시각))
+        self._memory: Dict[str, Tuple[NutritionRow, float]] = {}
+
+        self._conn = None
+        if path:
+            try:
+                self._conn = sqlite3.connect(path, check_same_thread=False)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS nutrition_cache ("
+                    " term TEXT PRIMARY KEY,"
+                    " food_name TEXT NOT NULL,"
+                    " kcal REAL NOT NULL, carb REAL NOT NULL, prot REAL NOT NULL, fat REAL NOT NULL,"
+                    " source TEXT NOT NULL, model TEXT,"
+                    " created_at REAL NOT NULL)"
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logging.warning(f"영양 디스크 캐시 사용 불가 ({path}), 메모리에만 저장합니다: {e}")
+                self._conn = None
+
+    def get(self, term: str) -> Optional[NutritionRow]:
+        return self.get_many([term]).get(term)
+
+    def get_many(self, terms: List[str]) -> Dict[str, NutritionRow]:
+        """정규화된 재료명 목록 → 캐시에 있는 (만료되지 않은) 항목만 {재료명: 행} - 디스크 조회 1회"""
+        terms = list(dict.fromkeys(terms))
+        if not terms:
+            return {}
+        with self._lock:
+            if self._conn is None:
+                rows = {t: self._memory[t] for t in terms if t in self._memory}
+            else:
+                placeholders = ",".join("?" for _ in terms)
+                try:
+                    found = self._conn.execute(
+                        "SELECT term, food_name, kcal, carb, prot, fat, created_at FROM nutrition_cache"
+                        f" WHERE term IN ({placeholders})",
+                        terms,
+                    ).fetchall()
+                except sqlite3.Error as e:
+                    logging.warning(f"영양 캐시 조회 실패 - {terms}: {e}")
+                    found = []
+                rows = {r[0]: (tuple(r[1:6]), r[6]) for r in found}
+            now = time.time()
+            hits = {
+                term: row for term, (row, created_at) in rows.items()
+                if self.ttl <= 0 or now - created_at <= self.ttl
+            }
+            self.hits += len(hits)
+            self.misses += len(terms) - len(hits)
+            return hits
+
+    def put_many(self, items: Dict[str, NutritionRow], source: str, model: Optional[str] = None) -> None:
+        """{정규화된 재료명: 행} 기록 - 디스크 커밋 1회"""
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            if self._conn is None:
+                self._memory.update({term: (tuple(row), now) for term, row in items.items()})
+                return
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO nutrition_cache"
+                    " (term, food_name, kcal, carb, prot, fat, source, model, created_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(term, *row, source, model, now) for term, row in items.items()],
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logging.warning(f"영양 캐시 기록 실패 - {list(items)}: {e}")
+
+    def put(self, term: str, row: NutritionRow, source: str, model: Optional[str] = None) -> None:
+        self.put_many({term: row}, source, model)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            if self._conn is None:
+                size = len(self._memory)
+            else:
+                size = self._conn.execute("SELECT COUNT(*) FROM nutrition_cache").fetchone()[0]
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "size": size,
+            }
+
+
+# ─── 3) single‑flight ─────────────────────────────────────────────────────
+class AsyncSingleFlight:
+    """
+    같은 key로 동시에 들어온 호출은 첫 호출 하나만 실행하고 나머지는 그 결과를 공유 (같은 이벤트 루프 안의 코루틴)
+    실제 호출은 별도 Task로 실행하므로 기다리던 쪽이 timeout으로 취소돼도 호출은 계속 진행
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, "asyncio.Task"] = {}
+
+    async def do_many(self, keys: List[str], fn: Callable[[List[str]], Awaitable[Dict[str, object]]]) -> Dict[str, object]:
+        """
+        여러 key를 한 번에 처리
+        • 이미 진행 중인 key는 그 결과를 기다림
+        • 나머지 key는 fn(나머지 key 목록) 1회 호출로 함께 처리 ({key: 결과} 반환)
+        """
+        owned = [k for k in dict.fromkeys(keys) if k not in self._calls]
+        if owned:
+            batch = asyncio.ensure_future(fn(owned))
+            for key in owned:
+                task = asyncio.ensure_future(_pick(batch, key))
+                self._calls[key] = task
+                task.add_done_callback(lambda t, key=key: self._finish(key, t))
+
+        tasks = {k: self._calls[k] for k in dict.fromkeys(keys)}
+        results = await asyncio.gather(*(asyncio.shield(t) for t in tasks.values()), return_exceptions=True)
+        return {
+            key: (None if isinstance(result, BaseException) else result)
+            for key, result in zip(tasks, results)
+        }
+
+    def _finish(self, key: str, task: "asyncio.Task") -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # 기다리는 쪽이 모두 취소된 경우 "exception was never retrieved" 경고 방지
+        if not task.cancelled():
+            task.exception()
+
+
+async def _pick(batch: "asyncio.Future", key: str):
+    return (await batch).get(key)
@@ -1,4 +1,4 @@
-# ─── 1) llama‑index 버전별 import 자동 처리 ──────────────────────────────────
+# ─── 1) 환경 설정 / llama‑index 지연 import ─────────────────────────────────
 import os
 
 # OpenAI API 키 설정
@@ -15,33 +15,71 @@ if api_key:
 else:
     print("\u26a0️ 경고: OPENAI_API_KEY가 설정되지 않았습니다. OpenAI 기능이 작동하지 않을 수 있습니다.")
 
-try:               # v0.12 (core 하위 모듈)
-    from llama_index.core import (
-        VectorStoreIndex,
-        Document,
-        StorageContext,
-        load_index_from_storage,
-        Settings,
-    )
+# llama-index 와 pandas 는 무거운 의존성 트리를 끌고 오므로 모듈 import 시점이 아니라
+# 실제로 인덱스를 로드/빌드할 때만 import 한다 (서빙 워커는 .npy 엔진 스냅샷만 사용)
+import sqlite3
+from types import SimpleNamespace
+
+
+def _llama():
+    """llama-index 버전별 import 자동 처리 (처음 호출 시 1회 import)"""
+    try:               # v0.12 (core 하위 모듈)
+        from llama_index.core import (
+            VectorStoreIndex,
+            Document,
+            StorageContext,
+            load_index_from_storage,
+            Settings,
+        )
+    except ImportError:          # v0.10 (top‑level)
+        from llama_index import (
+            VectorStoreIndex,
+            Document,
+            StorageContext,
+            load_index_from_storage,
+            Settings,
+        )
     from llama_index.embeddings.openai import OpenAIEmbedding
-except ImportError:          # v0.10 (top‑level)
-    from llama_index import (
-        VectorStoreIndex,
-        Document,
-        StorageContext,
-        load_index_from_storage,
-        Settings,
+    return SimpleNamespace(
+        VectorStoreIndex=VectorStoreIndex,
+        Document=Document,
+        StorageContext=StorageContext,
+        load_index_from_storage=load_index_from_storage,
+        Settings=Settings,
+        OpenAIEmbedding=OpenAIEmbedding,
     )
-    from llama_index.embeddings.openai import OpenAIEmbedding
-
-import sqlite3
-import pandas as pd
 
 # ─── 2) 공용 상수 ────────────────────────────────────────────────────────
 DB_PATH      = "foods.db"
 PERSIST_DIR  = "storage"
+EMBED_MODEL  = "text-embedding-ada-002"
+EMBED_BATCH  = 100          # 임베딩 API 1회 요청당 최대 문장 수
 
-# ─── 3) 공용 진입 함수 ────────────────────────────────────────────────────
+def document_text(name, kcal, carb, prot, fat) -> str:
+    """식품 1행 → 임베딩할 문서 텍스트 (build_or_load 와 build_index.py 가 공유)"""
+    kcal, carb, prot, fat = (_number_text(v) for v in (kcal, carb, prot, fat))
+    return f"{name} (100 g) → {kcal} kcal | C {carb} g | P {prot} g | F {fat} g"
+
+def _number_text(value) -> str:
+    """
+    숫자 표기 정규화 - 정수 값은 소수점 없이 (197.0 → "197"), 나머지는 repr (34.08 → "34.08")
+    초기 foods.db(엑셀 정수/실수 그대로 저장)로 만든 문서 텍스트와 같게 만들어
+    build_index.py 가 llama-index docstore 의 기존 임베딩을 재사용할 수 있도록 함
+    """
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return str(value)
+    if number.is_integer():
+        return str(int(number))
+    return repr(number)
+
+# ─── 3) 임베딩 모델 ───────────────────────────────────────────────────────
+def get_embed_model() -> "OpenAIEmbedding":
+    """인덱스 빌드에 쓰는 llama-index OpenAI 임베딩 모델 (서빙 질의는 embeddings.OpenAIEmbedder)"""
+    return _llama().OpenAIEmbedding(model=EMBED_MODEL, embed_batch_size=EMBED_BATCH)
+
+# ─── 4) 공용 진입 함수 ────────────────────────────────────────────────────
 def build_or_load(
     db_path: str = DB_PATH,
     persist_dir: str = PERSIST_DIR,
@@ -54,25 +92,29 @@ def build_or_load(
         • 없으면 → DB → 문서 → 인덱스 생성 후 snapshot 저장
     """
 
+    li = _llama()
+
     # ① 이미 스냅샷이 존재 → 로드
     if os.path.exists(persist_dir):
         print(f"🗂️  Loading vector index from  '{persist_dir}'")
-        storage_ctx = StorageContext.from_defaults(persist_dir=persist_dir)
-        return load_index_from_storage(storage_ctx)
+        storage_ctx = li.StorageContext.from_defaults(persist_dir=persist_dir)
+        return li.load_index_from_storage(storage_ctx)
+
+    # ② 새로 빌드 (pandas 는 빌드 경로에서만 필요)
+    import pandas as pd
 
-    # ② 새로 빌드
     print("🔨  Building vector index from foods.db …")
     with sqlite3.connect(db_path) as conn:
         df = pd.read_sql(
-            "SELECT rowid, 식품명, 에너지kcal, 탄수화물g, 단백질g, 지방g FROM foods",
+            "SELECT rowid AS rowid, 식품명, 에너지kcal, 탄수화물g, 단백질g, 지방g FROM foods",
             conn,
         )
 
     # OpenAI 임베딩 모델 설정
     try:
         # OpenAI 임베딩 사용 - text-embedding-ada-002
-        embed_model = OpenAIEmbedding(model="text-embedding-ada-002")
-        print("🔥 OpenAI 임베딩 사용 (text-embedding-ada-002)")
+        embed_model = get_embed_model()
+        print(f"🔥 OpenAI 임베딩 사용 ({EMBED_MODEL})")
     except Exception as e:
         print(f"Error: OpenAI 임베딩 모델 로드 실패: {e}")
         raise  # 임베딩 모델이 중요하기 때문에 오류 발생시 중단
@@ -80,19 +122,15 @@ def build_or_load(
     # 전역 임베딩 설정 적용
     try:
         # v0.10+ 버전 호환
-        Settings.embed_model = embed_model
+        li.Settings.embed_model = embed_model
         print("✅ OpenAI 임베딩 모델 적용 성공 (Settings API)")
     except Exception as e:
         # 예전 버전 호환성
         print(f"Warning: Settings API 사용 실패: {e}")
      
     docs = [
-        Document(
-            text=(
-                f"{row.식품명} (100 g) → "
-                f"{row.에너지kcal} kcal | C {row.탄수화물g} g | "
-                f"P {row.단백질g} g | F {row.지방g} g"
-            ),
+        li.Document(
+            text=document_text(row.식품명, row.에너지kcal, row.탄수화물g, row.단백질g, row.지방g),
             metadata={
                 "rowid": int(row.rowid),   # fast SQLite lookup
                 "식품명": row.식품명,
@@ -105,13 +143,13 @@ def build_or_load(
     print(f"📚 문서 {len(docs)}개로 인덱스 생성 중 (OpenAI 임베딩 사용)...")
     try:
         # v0.10+ 버전 호환
-        index = VectorStoreIndex.from_documents(
+        index = li.VectorStoreIndex.from_documents(
             docs, 
             embed_model=embed_model
         )
     except TypeError:
         # 이전 버전 호환성
-        index = VectorStoreIndex.from_documents(docs)
+        index = li.VectorStoreIndex.from_documents(docs)
         
     index.storage_context.persist(persist_dir=persist_dir)
     print(f"✅  Saved vector snapshot → '{persist_dir}'  ({len(df)} docs)")
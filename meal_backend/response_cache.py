@@ -0,0 +1,109 @@
+# ── response_cache.py ─────────────────────────────────────────
+# /recommend 응답 캐시: 요청(재료·체중·목표·끼니) + DB/인덱스 버전 → 직렬화된 응답 본문 (LRU + TTL, ETag)
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+# ─── 1) 설정 ──────────────────────────────────────────────────────────────
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))     # 최대 항목 수 (0 이면 사용 안 함)
+RESPONSE_CACHE_TTL  = float(os.getenv("RESPONSE_CACHE_TTL", "600"))     # 초
+
+
+def request_ingredients(ingredients: List[str]) -> List[str]:
+    """검색·배분에 쓰는 재료 목록: 앞뒤 공백 제거, 빈 값 제외 (요청 순서 그대로)"""
+    return [t.strip() for t in ingredients if t and t.strip()]
+
+
+def canonical_key(ingredients: List[str], weight: float, goal: str, meals: int, version: str) -> str:
+    """
+    캐시 키 - 재료는 검색·배분에 쓰는 목록(request_ingredients) 그대로
+    대소문자·공백만 달라도 검색(LIKE 전체 문구)과 GPT 식품명이 달라지므로 정규화하지 않음
+    """
+    payload = json.dumps(
+        [ingredients, round(float(weight), 3), goal, int(meals), version],
+        ensure_ascii=False, separators=(",", ":"),
+    )
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match 헤더 (쉼표 목록, W/ 약한 비교, *) 와 ETag 비교"""
+    if not if_none_match:
+        return False
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    if "*" in candidates:
+        return True
+    return any((c[2:] if c.startswith("W/") else c) == etag for c in candidates)
+
+
+# ─── 2) 캐시 ──────────────────────────────────────────────────────────────
+class ResponseCache:
+    """
+    • get():   키 → (본문, ETag) - 없거나 TTL 이 지났으면 None
+    • put():   본문 저장 후 ETag 반환, 크기 초과 시 가장 오래 안 쓴 항목 제거
+    • stats(): 적중/미적중/304/제거 카운터
+    """
+
+    def __init__(self, max_size: int = RESPONSE_CACHE_SIZE, ttl: float = RESPONSE_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._items: "OrderedDict[str, Tuple[bytes, str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def get(self, key: str) -> Optional[Tuple[bytes, str]]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None or (self.ttl > 0 and time.monotonic() - item[2] > self.ttl):
+                if item is not None:
+                    del self._items[key]
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[0], item[1]
+
+    def put(self, key: str, body: bytes) -> str:
+        etag = make_etag(body)
+        with self._lock:
+            self._items[key] = (body, etag, time.monotonic())
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+                self.evictions += 1
+        return etag
+
+    def record_not_modified(self) -> None:
+        with self._lock:
+            self.not_modified += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "not_modified": self.not_modified,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "size": len(self._items),
+                "evictions": self.evictions,
+            }
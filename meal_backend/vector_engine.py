@@ -0,0 +1,322 @@
+# ── vector_engine.py ──────────────────────────────────────────
+# 식품 임베딩을 하나의 행렬로 묶어 NumPy로 top‑k 코사인 검색을 수행하는 엔진
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ivf_index import IVFIndex, IVF_NPROBE
+
+# ─── 0) 스냅샷 파일 구성 ──────────────────────────────────────────────────
+# storage/engine/            (이전 버전) llama-index 스냅샷에서 변환한 엔진 - CURRENT 가 없을 때만 사용
+# storage/engine-<version>/  build_index.py 로 빌드하거나 변환한 엔진 (storage/CURRENT 가 가리키는 폴더를 사용)
+#   ├── vectors.npy   정규화된 임베딩 행렬 (float32 또는 float16, C‑contiguous)
+#   ├── rowids.npy    행렬 각 행에 대응하는 foods.rowid (int64)
+#   ├── hashes.npy    (빌드 엔진만) 각 행 문서 텍스트의 해시 - 증분 재빌드용
+#   ├── ivf_*.npy     (선택) IVF 근사 검색 인덱스 - 이 경우 위 행들은 클러스터 순으로 정렬됨
+#   └── meta.json     문서 수, 차원, dtype, 원본 스냅샷 정보
+ENGINE_SUBDIR   = "engine"
+CURRENT_FILE    = "CURRENT"
+VECTORS_FILE    = "vectors.npy"
+ROWIDS_FILE     = "rowids.npy"
+HASHES_FILE     = "hashes.npy"
+META_FILE       = "meta.json"
+BUILD_SOURCE    = "build_index"  # meta["source"] - llama-index 스냅샷과 무관하게 빌드된 엔진
+SCORE_CHUNK     = 8192          # float16 행렬을 float32로 나눠 계산할 때의 행 수
+
+# llama-index SimpleVectorStore / docstore 스냅샷 파일명
+LLAMA_VECTOR_STORE = "default__vector_store.json"
+LLAMA_DOCSTORE     = "docstore.json"
+
+
+# ─── 1) 엔진 ──────────────────────────────────────────────────────────────
+class VectorEngine:
+    """
+    (문서 수 × 차원) 임베딩 행렬 + rowid 배열
+
+    • 행렬은 생성 시 행 단위로 L2 정규화 → 내적 = 코사인 유사도
+    • 여러 질의를 한 번의 행렬곱으로 점수화 (search_batch)
+    • save()/load()로 .npy 스냅샷 저장, load 시 memory‑map (워커 간 페이지 공유)
+    • ivf 가 있으면 질의와 가까운 nprobe 개 클러스터만 점수화 (nprobe <= 0 이면 전수 검색)
+    """
+
+    def __init__(self, matrix: np.ndarray, rowids: np.ndarray, normalized: bool = False):
+        if matrix.ndim != 2 or len(matrix) != len(rowids):
+            raise ValueError(f"임베딩 행렬/rowid 크기 불일치: {matrix.shape} vs {len(rowids)}")
+        if normalized:
+            # 이미 정규화된 스냅샷 (memmap 포함) - 복사하지 않고 그대로 사용
+            self.matrix = matrix
+        else:
+            self.matrix = _normalize(np.asarray(matrix, dtype=np.float32))
+        self.rowids = np.asarray(rowids, dtype=np.int64)
+        self.meta: dict = {}
+        self.ivf: Optional[IVFIndex] = None
+        self.nprobe = IVF_NPROBE
+
+    def __len__(self) -> int:
+        return len(self.rowids)
+
+    @property
+    def dim(self) -> int:
+        return self.matrix.shape[1]
+
+    # ── llama-index 인덱스에서 생성 ─────────────────────────────
+    @classmethod
+    def from_index(cls, index) -> "VectorEngine":
+        """
+        로드된 VectorStoreIndex(SimpleVectorStore)의 임베딩과
+        docstore 메타데이터의 rowid로 엔진을 구성
+        """
+        store = index.vector_store.to_dict()
+        embedding_dict = store["embedding_dict"]
+        docs = index.docstore.docs
+
+        vectors, rowids = [], []
+        for node_id, embedding in embedding_dict.items():
+            node = docs.get(node_id)
+            metadata = getattr(node, "metadata", None) or {}
+            if "rowid" not in metadata:
+                continue
+            vectors.append(embedding)
+            rowids.append(int(metadata["rowid"]))
+
+        if not vectors:
+            raise ValueError("rowid 메타데이터가 있는 임베딩이 없습니다")
+
+        logging.info(f"VectorEngine 생성: 문서 {len(rowids)}개, 차원 {len(vectors[0])}")
+        return cls(np.asarray(vectors, dtype=np.float32), np.asarray(rowids))
+
+    # ── llama-index 스냅샷(JSON)에서 직접 생성 ──────────────────
+    @classmethod
+    def from_llama_snapshot(cls, persist_dir: str) -> "VectorEngine":
+        """
+        storage/ 의 JSON 스냅샷을 llama-index 없이 읽어 엔진을 구성
+        (rowid는 vector store의 metadata_dict 우선, 없으면 docstore.json 사용)
+        """
+        with open(os.path.join(persist_dir, LLAMA_VECTOR_STORE), encoding="utf-8") as f:
+            store = json.load(f)
+        embedding_dict = store.get("embedding_dict", {})
+        metadata_dict = store.get("metadata_dict") or {}
+
+        # metadata_dict에 rowid가 없으면 docstore에서 보충 (대용량이므로 필요할 때만 로드)
+        missing = [nid for nid in embedding_dict if "rowid" not in metadata_dict.get(nid, {})]
+        if missing:
+            docstore_path = os.path.join(persist_dir, LLAMA_DOCSTORE)
+            with open(docstore_path, encoding="utf-8") as f:
+                docs = json.load(f).get("docstore/data", {})
+            for nid in missing:
+                data = docs.get(nid, {}).get("__data__", {})
+                if "rowid" in data.get("metadata", {}):
+                    metadata_dict[nid] = data["metadata"]
+            del docs
+
+        vectors, rowids = [], []
+        for node_id, embedding in embedding_dict.items():
+            metadata = metadata_dict.get(node_id, {})
+            if "rowid" not in metadata:
+                continue
+            vectors.append(embedding)
+            rowids.append(int(metadata["rowid"]))
+
+        if not vectors:
+            raise ValueError(f"'{persist_dir}' 스냅샷에 rowid가 있는 임베딩이 없습니다")
+
+        logging.info(f"llama-index 스냅샷 변환: 문서 {len(rowids)}개, 차원 {len(vectors[0])}")
+        return cls(np.asarray(vectors, dtype=np.float32), np.asarray(rowids))
+
+    # ── .npy 스냅샷 저장 / 로드 ────────────────────────────────
+    def save(
+        self,
+        engine_dir: str,
+        dtype: str = "float32",
+        extra_meta: Optional[dict] = None,
+        extra_arrays: Optional[Dict[str, np.ndarray]] = None,
+    ) -> None:
+        """
+        새 폴더에 저장 (extra_arrays: {파일명: 행별 배열})
+        같은 폴더 안의 고유 임시 폴더에 모두 기록한 뒤 rename 으로 공개 - 이미 있는 폴더는 덮어쓰지 않음(OSError)
+        """
+        parent = os.path.dirname(engine_dir.rstrip(os.sep)) or "."
+        os.makedirs(parent, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(prefix=os.path.basename(engine_dir.rstrip(os.sep)) + ".tmp-", dir=parent)
+        try:
+            np.save(os.path.join(tmp_dir, VECTORS_FILE), np.ascontiguousarray(self.matrix, dtype=dtype))
+            np.save(os.path.join(tmp_dir, ROWIDS_FILE), self.rowids)
+            for name, array in (extra_arrays or {}).items():
+                np.save(os.path.join(tmp_dir, name), array)
+            meta = {
+                "count": len(self),
+                "dim": self.dim,
+                "dtype": dtype,
+                "created_at": time.time(),
+            }
+            meta.update(extra_meta or {})
+            with open(os.path.join(tmp_dir, META_FILE), "w", encoding="utf-8") as f:
+                json.dump(meta, f, ensure_ascii=False, indent=2)
+            os.rename(tmp_dir, engine_dir)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        logging.info(f"VectorEngine 스냅샷 저장 → '{engine_dir}' ({len(self)}개, {dtype})")
+
+    @classmethod
+    def load(cls, engine_dir: str, mmap: bool = True) -> "VectorEngine":
+        """저장된 .npy 스냅샷 로드 (mmap=True면 읽기 전용 memory‑map)"""
+        mode = "r" if mmap else None
+        matrix = np.load(os.path.join(engine_dir, VECTORS_FILE), mmap_mode=mode)
+        rowids = np.load(os.path.join(engine_dir, ROWIDS_FILE))
+        engine = cls(matrix, rowids, normalized=True)
+        engine.meta = read_meta(engine_dir)
+        engine.ivf = IVFIndex.load(engine_dir, mmap=mmap)
+        ann = f", IVF nlist {engine.ivf.nlist} / nprobe {engine.nprobe}" if engine.ivf is not None else ""
+        logging.info(f"VectorEngine 로드: 문서 {len(engine)}개, 차원 {engine.dim}, dtype {matrix.dtype}{ann}")
+        return engine
+
+    # ── 검색 ────────────────────────────────────────────────────
+    def search(self, query: np.ndarray, top_k: int = 5) -> List[Tuple[int, float]]:
+        """단일 질의 임베딩 → [(rowid, score)] (유사도 내림차순)"""
+        return self.search_batch(np.asarray(query, dtype=np.float32)[None, :], top_k)[0]
+
+    def search_batch(self, queries: np.ndarray, top_k: int = 5, exact: bool = False) -> List[List[Tuple[int, float]]]:
+        """
+        (질의 수 × 차원) 행렬을 한 번의 행렬곱으로 점수화
+        IVF 인덱스가 있으면 근사 검색 (exact=True 면 항상 전수 검색 - recall 기준값)
+
+        반환값: 질의별 [(rowid, score)] 목록 (유사도 내림차순)
+        """
+        queries = _normalize(np.asarray(queries, dtype=np.float32))
+        if queries.shape[1] != self.dim:
+            raise ValueError(f"질의 차원 불일치: {queries.shape[1]} (인덱스 {self.dim})")
+
+        k = min(top_k, len(self))
+        if k <= 0:
+            return [[] for _ in range(len(queries))]
+
+        if not exact and self.ivf is not None and 0 < self.nprobe < self.ivf.nlist:
+            return [
+                [(int(self.rowids[i]), float(s)) for i, s in zip(idx, scores)]
+                for idx, scores in self.ivf.search(self.matrix, queries, k, self.nprobe)
+            ]
+
+        scores = self._scores(queries)                          # (질의 수 × 문서 수)
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]    # 정렬 없이 상위 k개 선택
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)                 # k개만 정렬
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+        return [
+            [(int(self.rowids[i]), float(s)) for i, s in zip(idx_row, score_row)]
+            for idx_row, score_row in zip(top, top_scores)
+        ]
+
+    def _scores(self, queries: np.ndarray) -> np.ndarray:
+        """정규화된 질의 행렬과 전체 문서의 코사인 유사도"""
+        if self.matrix.dtype == np.float32:
+            return queries @ self.matrix.T
+        # float16 스냅샷: BLAS를 쓰도록 행 블록 단위로 float32 변환 후 계산
+        scores = np.empty((len(queries), len(self)), dtype=np.float32)
+        for start in range(0, len(self), SCORE_CHUNK):
+            block = np.asarray(self.matrix[start:start + SCORE_CHUNK], dtype=np.float32)
+            scores[:, start:start + SCORE_CHUNK] = queries @ block.T
+        return scores
+
+
+# ─── 2) 스냅샷 관리 ───────────────────────────────────────────────────────
+def engine_dir_for(persist_dir: str) -> str:
+    """현재 엔진 폴더 - CURRENT 가 가리키는 빌드 버전, 없으면 storage/engine"""
+    try:
+        with open(os.path.join(persist_dir, CURRENT_FILE), encoding="utf-8") as f:
+            name = f.read().strip()
+        if name and os.path.isdir(os.path.join(persist_dir, name)):
+            return os.path.join(persist_dir, name)
+    except OSError:
+        pass
+    return os.path.join(persist_dir, ENGINE_SUBDIR)
+
+
+def publish_engine_dir(persist_dir: str, engine_dir: str) -> None:
+    """CURRENT 파일을 임시 파일 + os.replace 로 교체 (읽는 쪽은 이전/새 버전 중 하나만 봄)"""
+    tmp_path = os.path.join(persist_dir, CURRENT_FILE + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(os.path.basename(engine_dir.rstrip(os.sep)) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, os.path.join(persist_dir, CURRENT_FILE))
+
+
+def read_meta(engine_dir: str) -> dict:
+    try:
+        with open(os.path.join(engine_dir, META_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def next_engine_dir(persist_dir: str) -> Tuple[int, str]:
+    """다음 빌드 버전 번호와 폴더 경로 (CURRENT 버전과 기존 engine-<version> 폴더보다 큰 번호)"""
+    prefix = ENGINE_SUBDIR + "-"
+    versions = [int(read_meta(engine_dir_for(persist_dir)).get("version", 0))]
+    if os.path.isdir(persist_dir):
+        versions += [
+            int(name[len(prefix):]) for name in os.listdir(persist_dir)
+            if name.startswith(prefix) and name[len(prefix):].isdigit()
+        ]
+    version = max(versions) + 1
+    return version, os.path.join(persist_dir, f"{prefix}{version:04d}")
+
+
+def convert_llama_snapshot(persist_dir: str, dtype: str = "float32") -> str:
+    """
+    llama-index JSON 스냅샷 → 새 버전 폴더에 엔진 저장 후 CURRENT 교체 (오프라인 - build_index.py 에서 호출)
+    서빙 워커는 변환하지 않음 - 여러 워커가 같은 폴더에 동시에 쓰지 않도록
+    """
+    source = os.path.join(persist_dir, LLAMA_VECTOR_STORE)
+    engine = VectorEngine.from_llama_snapshot(persist_dir)
+    version, engine_dir = next_engine_dir(persist_dir)
+    engine.save(engine_dir, dtype=dtype, extra_meta={"source_mtime": os.path.getmtime(source), "version": version})
+    publish_engine_dir(persist_dir, engine_dir)
+    return engine_dir
+
+
+def llama_snapshot_stale(persist_dir: str) -> bool:
+    """현재 엔진이 없거나, llama-index 에서 변환한 엔진인데 원본 JSON 이 그 뒤에 바뀌었으면 True"""
+    meta = read_meta(engine_dir_for(persist_dir))
+    if not meta:
+        return True
+    if meta.get("source") == BUILD_SOURCE:
+        return False
+    source = os.path.join(persist_dir, LLAMA_VECTOR_STORE)
+    return os.path.exists(source) and meta.get("source_mtime") != os.path.getmtime(source)
+
+
+def load_current(persist_dir: str, dtype: str = "float32", mmap: bool = True) -> VectorEngine:
+    """
+    Returns
+    -------
+    VectorEngine
+        • CURRENT 가 가리키는 엔진 폴더(없으면 storage/engine)를 memory‑map 로드
+        • 엔진이 없거나 llama-index 스냅샷보다 오래됐으면 FileNotFoundError (변환은 python build_index.py)
+    """
+    engine_dir = engine_dir_for(persist_dir)
+    if llama_snapshot_stale(persist_dir):
+        raise FileNotFoundError(
+            f"'{engine_dir}' 엔진 스냅샷이 없거나 llama-index 스냅샷보다 오래됐습니다 (python build_index.py 로 생성)"
+        )
+    meta = read_meta(engine_dir)
+    if meta.get("dtype") != dtype:
+        logging.warning(f"엔진 스냅샷 dtype {meta.get('dtype')} ≠ 설정 {dtype} - 스냅샷 dtype 으로 로드합니다")
+    return VectorEngine.load(engine_dir, mmap=mmap)
+
+
+# ─── 3) 내부 헬퍼 ─────────────────────────────────────────────────────────
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    """행 단위 L2 정규화 (영벡터는 그대로 둠)"""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms